@@ -9,8 +9,11 @@ Handles all communication with Google Gemini API including:
 """
 
 from .gemini_client import (
+    ApiKeyPool,
     get_api_key,
+    get_api_key_pool,
     call_gemini_image_edit,
+    call_gemini_batch_image_edit,
     call_gemini_text_or_refs,
     load_config,
     save_config,
@@ -37,8 +40,11 @@ from .prompt_builders import (
 
 __all__ = [
     # Client functions
+    "ApiKeyPool",
     "get_api_key",
+    "get_api_key_pool",
     "call_gemini_image_edit",
+    "call_gemini_batch_image_edit",
     "call_gemini_text_or_refs",
     "load_config",
     "save_config",
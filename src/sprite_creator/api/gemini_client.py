@@ -5,18 +5,26 @@ Handles authentication, API calls, retries, and response parsing for Google Gemi
 """
 
 import base64
+import itertools
 import json
 import os
+import threading
+import time
 import webbrowser
 from io import BytesIO
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 import requests
 from PIL import Image
 from rembg import remove as rembg_remove, new_session as rembg_new_session
 
-from ..config import CONFIG_PATH, GEMINI_API_URL
+from ..config import (
+    CONFIG_PATH,
+    GEMINI_API_BASE_URL,
+    GEMINI_API_URL,
+    GEMINI_BATCH_API_URL,
+)
 from ..logging_utils import log_api_call, log_debug, log_info, log_warning, log_error
 from .exceptions import GeminiAPIError, GeminiSafetyError
 
@@ -57,6 +65,20 @@ REMBG_EDGE_CLEANUP = True  # Enable edge halo cleanup after AI removal
 REMBG_EDGE_CLEANUP_TOLERANCE = 0  # Color distance threshold (0-255, higher=more aggressive)
 REMBG_EDGE_CLEANUP_PASSES = 0  # Number of edge cleanup iterations
 
+# Finish reasons that mean Gemini refused to produce the image
+SAFETY_FINISH_REASONS = ("SAFETY", "IMAGE_SAFETY", "IMAGE_OTHER")
+
+# Batch API polling: start short, back off exponentially up to the cap
+BATCH_POLL_INITIAL_SECONDS = 5.0
+BATCH_POLL_MAX_SECONDS = 60.0
+BATCH_MAX_WAIT_SECONDS = 2 * 60 * 60
+
+# How long a rate-limited key sits out when the server sends no Retry-After
+DEFAULT_KEY_QUARANTINE_SECONDS = 60.0
+
+# A single API key, or several keys to rotate between
+ApiKeys = Union[str, Sequence[str]]
+
 
 # =============================================================================
 # Configuration Management
@@ -170,6 +192,83 @@ def get_api_key(use_gui: bool = True) -> str:
         return interactive_api_key_setup()
 
 
+# =============================================================================
+# API Key Rotation
+# =============================================================================
+
+class ApiKeyPool:
+    """
+    Thread-safe round-robin pool of Gemini API keys.
+
+    Each call takes the next key in turn. Keys that hit the rate limit (HTTP 429)
+    are quarantined for the server's Retry-After period and skipped until it
+    expires, so the effective request rate scales with the number of keys.
+    """
+
+    def __init__(self, api_keys: Sequence[str]):
+        keys = [key for key in dict.fromkeys(api_keys) if key]
+        if not keys:
+            raise ValueError("ApiKeyPool needs at least one API key")
+        self._keys = keys
+        self._cycle = itertools.cycle(keys)
+        self._quarantined_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def next_key(self) -> str:
+        """Return the next key that isn't quarantined."""
+        with self._lock:
+            now = time.monotonic()
+            for _ in range(len(self._keys)):
+                key = next(self._cycle)
+                if self._quarantined_until.get(key, 0.0) <= now:
+                    return key
+            # Every key is rate limited: use the one that frees up first
+            return min(self._keys, key=lambda k: self._quarantined_until.get(k, 0.0))
+
+    def quarantine(self, key: str, seconds: float) -> None:
+        """Skip key for the given number of seconds."""
+        with self._lock:
+            self._quarantined_until[key] = time.monotonic() + seconds
+
+
+# Pools are shared per key set so rotation state persists across calls
+_key_pools: Dict[Tuple[str, ...], ApiKeyPool] = {}
+_key_pools_lock = threading.Lock()
+
+
+def get_api_key_pool(api_keys: ApiKeys) -> ApiKeyPool:
+    """
+    Return the shared ApiKeyPool for a key or list of keys.
+
+    Passing a single string gives a one-key pool, so existing single-key
+    callers work unchanged.
+
+    Args:
+        api_keys: One Gemini API key or a sequence of keys.
+
+    Returns:
+        The pool for this set of keys.
+    """
+    keys = (api_keys,) if isinstance(api_keys, str) else tuple(api_keys)
+    with _key_pools_lock:
+        pool = _key_pools.get(keys)
+        if pool is None:
+            pool = ApiKeyPool(keys)
+            _key_pools[keys] = pool
+        return pool
+
+
+def _retry_after_seconds(response: requests.Response) -> float:
+    """Read the Retry-After header (in seconds), falling back to the default."""
+    try:
+        return max(float(response.headers.get("Retry-After", "")), 1.0)
+    except ValueError:
+        return DEFAULT_KEY_QUARANTINE_SECONDS
+
+
 # =============================================================================
 # Image Utilities
 # =============================================================================
@@ -222,14 +321,22 @@ def _extract_inline_image_from_response(data: dict) -> Optional[bytes]:
 
 # Global session for rembg (reused for performance)
 _rembg_session = None
+_rembg_session_lock = threading.Lock()
 
 
 def get_rembg_session():
-    """Get or create the rembg session (lazy initialization)."""
+    """
+    Get or create the rembg session (lazy initialization).
+
+    Generation runs on background threads, so creation is locked to make sure
+    the ONNX model is only loaded once even if two threads need it at startup.
+    """
     global _rembg_session
     if _rembg_session is None:
-        print(f"  [INFO] Initializing AI background removal model: {REMBG_MODEL}...")
-        _rembg_session = rembg_new_session(REMBG_MODEL)
+        with _rembg_session_lock:
+            if _rembg_session is None:
+                print(f"  [INFO] Initializing AI background removal model: {REMBG_MODEL}...")
+                _rembg_session = rembg_new_session(REMBG_MODEL)
     return _rembg_session
 
 
@@ -510,7 +617,7 @@ def strip_background_threshold(image_bytes: bytes) -> bytes:
 # =============================================================================
 
 def _call_gemini_with_parts(
-    api_key: str,
+    api_key: ApiKeys,
     parts: List[dict],
     context: str,
     skip_background_removal: bool = False,
@@ -521,10 +628,12 @@ def _call_gemini_with_parts(
     Call Gemini API with custom parts array and retry logic.
 
     Handles retries for transient errors (429, 500, 502, 503, 504).
+    When several API keys are given, each attempt uses the next key and keys
+    that get rate limited are quarantined.
     Applies AI background removal to returned images unless skipped.
 
     Args:
-        api_key: Google Gemini API key.
+        api_key: Google Gemini API key, or a sequence of keys to rotate between.
         parts: List of content parts (text, images, etc.).
         context: Description of the operation for error messages.
         skip_background_removal: If True, return raw image without background removal.
@@ -538,13 +647,15 @@ def _call_gemini_with_parts(
         RuntimeError: If API call fails after all retries.
     """
     payload = {"contents": [{"parts": parts}]}
-    headers = {"Content-Type": "application/json", "x-goog-api-key": api_key}
+    key_pool = get_api_key_pool(api_key)
     max_retries = 3
     last_error = None
 
     log_debug(f"Gemini API call starting: {context}")
 
     for attempt in range(1, max_retries + 1):
+        current_key = key_pool.next_key()
+        headers = {"Content-Type": "application/json", "x-goog-api-key": current_key}
         try:
             response = requests.post(
                 GEMINI_API_URL,
@@ -554,6 +665,8 @@ def _call_gemini_with_parts(
 
             # Handle retryable errors
             if not response.ok:
+                if response.status_code == 429:
+                    key_pool.quarantine(current_key, _retry_after_seconds(response))
                 if response.status_code in (429, 500, 502, 503, 504) and attempt < max_retries:
                     log_warning(f"Gemini API error {response.status_code} ({context}) attempt {attempt}, retrying...")
                     print(
@@ -588,7 +701,7 @@ def _call_gemini_with_parts(
             candidates = data.get("candidates", [])
             for candidate in candidates:
                 finish_reason = candidate.get("finishReason")
-                if finish_reason in ("SAFETY", "IMAGE_SAFETY", "IMAGE_OTHER"):
+                if finish_reason in SAFETY_FINISH_REASONS:
                     safety_ratings = candidate.get("safetyRatings", [])
                     log_api_call(context, False, f"Safety blocked: {finish_reason}")
                     raise GeminiSafetyError(
@@ -644,7 +757,7 @@ def _call_gemini_with_parts(
 
 
 def call_gemini_image_edit(
-    api_key: str,
+    api_key: ApiKeys,
     prompt: str,
     image_b64: str,
     skip_background_removal: bool = False,
@@ -657,7 +770,7 @@ def call_gemini_image_edit(
     AI background removal is automatically applied to the result unless skipped.
 
     Args:
-        api_key: Google Gemini API key.
+        api_key: Google Gemini API key, or a sequence of keys to rotate between.
         prompt: Text prompt describing the desired edit.
         image_b64: Base64-encoded input image.
         skip_background_removal: If True, return raw image without background removal.
@@ -680,7 +793,7 @@ def call_gemini_image_edit(
 
 
 def call_gemini_text(
-    api_key: str,
+    api_key: ApiKeys,
     prompt: str,
     temperature: float = 1.0,
 ) -> str:
@@ -690,7 +803,7 @@ def call_gemini_text(
     Used for generating outfit descriptions dynamically.
 
     Args:
-        api_key: Google Gemini API key.
+        api_key: Google Gemini API key, or a sequence of keys to rotate between.
         prompt: Text prompt to send.
         temperature: Sampling temperature (0.0-2.0, default 1.0).
 
@@ -710,7 +823,7 @@ def call_gemini_text(
     }
     headers = {
         "Content-Type": "application/json",
-        "x-goog-api-key": api_key
+        "x-goog-api-key": get_api_key_pool(api_key).next_key()
     }
 
     try:
@@ -745,7 +858,7 @@ def call_gemini_text(
 
 
 def call_gemini_fusion(
-    api_key: str,
+    api_key: ApiKeys,
     prompt: str,
     left_image_b64: str,
     right_image_b64: str,
@@ -760,7 +873,7 @@ def call_gemini_fusion(
     AI background removal is automatically applied to the result unless skipped.
 
     Args:
-        api_key: Google Gemini API key.
+        api_key: Google Gemini API key, or a sequence of keys to rotate between.
         prompt: Text prompt describing the desired fusion.
         left_image_b64: Base64-encoded left character image.
         right_image_b64: Base64-encoded right character image.
@@ -785,7 +898,7 @@ def call_gemini_fusion(
 
 
 def call_gemini_text_or_refs(
-    api_key: str,
+    api_key: ApiKeys,
     prompt: str,
     ref_images: Optional[List[Path]] = None,
     skip_background_removal: bool = False,
@@ -799,7 +912,7 @@ def call_gemini_text_or_refs(
     style references. AI background removal is automatically applied unless skipped.
 
     Args:
-        api_key: Google Gemini API key.
+        api_key: Google Gemini API key, or a sequence of keys to rotate between.
         prompt: Text prompt describing what to generate.
         ref_images: Optional list of reference image paths for style guidance.
         skip_background_removal: If True, return raw image without background removal.
@@ -828,3 +941,146 @@ def call_gemini_text_or_refs(
         api_key, parts, "text_or_refs", skip_background_removal,
         edge_cleanup_tolerance, edge_cleanup_passes
     )
+
+
+# =============================================================================
+# Gemini Batch API
+# =============================================================================
+
+def call_gemini_batch_image_edit(
+    api_key: ApiKeys,
+    edit_requests: List[Tuple[str, str, str]],
+    skip_background_removal: bool = False,
+    display_name: str = "sprite-creator-outfits",
+    poll_callback: Optional[Callable[[str], None]] = None,
+) -> Dict[str, bytes]:
+    """
+    Submit several image edits as a single Gemini Batch API job and wait for it.
+
+    Batch jobs are billed at a discount and don't count against the per-minute
+    request limit, at the cost of queueing latency. Polling backs off
+    exponentially from BATCH_POLL_INITIAL_SECONDS to BATCH_POLL_MAX_SECONDS.
+
+    Args:
+        api_key: Google Gemini API key, or a sequence of keys to rotate between.
+        edit_requests: List of (prompt, image_b64, key) tuples. Keys must be unique.
+        skip_background_removal: If True, return raw images without background removal.
+        display_name: Name shown for the batch job in Google AI Studio.
+        poll_callback: Optional callback receiving the batch state on each poll.
+
+    Returns:
+        Dict mapping request keys to image bytes. Requests that were blocked by
+        safety filters or returned no image are omitted, so the caller can retry
+        them individually.
+
+    Raises:
+        GeminiAPIError: If the batch can't be created, fails, or times out.
+    """
+    keys = [key for _, _, key in edit_requests]
+    inline_requests = [
+        {
+            "request": {
+                "contents": [{
+                    "parts": [
+                        {"text": prompt},
+                        {"inline_data": {"mime_type": "image/png", "data": image_b64}},
+                    ]
+                }]
+            },
+            "metadata": {"key": key},
+        }
+        for prompt, image_b64, key in edit_requests
+    ]
+    payload = {
+        "batch": {
+            "display_name": display_name,
+            "input_config": {"requests": {"requests": inline_requests}},
+        }
+    }
+    # Batches are owned by the project of the key that created them, so poll with the same key
+    batch_key = get_api_key_pool(api_key).next_key()
+    headers = {"Content-Type": "application/json", "x-goog-api-key": batch_key}
+
+    log_info(f"GEMINI: batch image_edit with {len(inline_requests)} requests: {', '.join(keys)}")
+    try:
+        response = requests.post(GEMINI_BATCH_API_URL, headers=headers, data=json.dumps(payload))
+    except Exception as e:
+        log_api_call("batch_image_edit", False, str(e))
+        raise GeminiAPIError(f"Gemini batch submission failed: {e}")
+
+    if not response.ok:
+        log_api_call("batch_image_edit", False, f"HTTP {response.status_code}: {response.text[:200]}")
+        raise GeminiAPIError(f"Gemini batch API error {response.status_code}: {response.text}")
+
+    batch_name = response.json().get("name")
+    if not batch_name:
+        raise GeminiAPIError("Gemini batch API did not return a batch name.")
+    log_debug(f"Gemini batch created: {batch_name}")
+
+    # Poll until the job reaches a terminal state
+    status_url = f"{GEMINI_API_BASE_URL}/{batch_name}"
+    delay = BATCH_POLL_INITIAL_SECONDS
+    waited = 0.0
+    operation: dict = {}
+    while True:
+        time.sleep(delay)
+        waited += delay
+        try:
+            poll = requests.get(status_url, headers={"x-goog-api-key": batch_key})
+        except Exception as e:
+            poll = None
+            log_warning(f"Gemini batch poll failed ({batch_name}): {e}")
+
+        if poll is not None and poll.ok:
+            operation = poll.json()
+            state = operation.get("metadata", {}).get("state", "")
+            if poll_callback:
+                poll_callback(state)
+            if operation.get("done"):
+                break
+        elif poll is not None and poll.status_code not in (429, 500, 502, 503, 504):
+            log_api_call("batch_image_edit", False, f"Poll HTTP {poll.status_code}")
+            raise GeminiAPIError(f"Gemini batch poll error {poll.status_code}: {poll.text}")
+
+        if waited >= BATCH_MAX_WAIT_SECONDS:
+            log_api_call("batch_image_edit", False, f"Timed out after {int(waited)}s")
+            raise GeminiAPIError(f"Gemini batch {batch_name} did not finish in time.")
+        delay = min(delay * 2, BATCH_POLL_MAX_SECONDS)
+
+    state = operation.get("metadata", {}).get("state", "")
+    if "error" in operation or state != "BATCH_STATE_SUCCEEDED":
+        error = operation.get("error", {}).get("message", state)
+        log_api_call("batch_image_edit", False, f"Batch ended unsuccessfully: {error}")
+        raise GeminiAPIError(f"Gemini batch {batch_name} failed: {error}")
+
+    inlined = operation.get("response", {}).get("inlinedResponses", [])
+    if isinstance(inlined, dict):
+        inlined = inlined.get("inlinedResponses", [])
+
+    results: Dict[str, bytes] = {}
+    for idx, entry in enumerate(inlined):
+        # Responses come back in request order; metadata is used when present
+        key = (entry.get("metadata") or {}).get("key")
+        if key is None and idx < len(keys):
+            key = keys[idx]
+        if key is None:
+            continue
+        if "error" in entry:
+            log_warning(f"Gemini batch request '{key}' failed: {entry['error']}")
+            continue
+
+        data = entry.get("response", {})
+        finish_reasons = [c.get("finishReason") for c in data.get("candidates", [])]
+        if any(reason in SAFETY_FINISH_REASONS for reason in finish_reasons):
+            log_api_call(f"batch_image_edit:{key}", False, f"Safety blocked: {finish_reasons}")
+            continue
+
+        raw_bytes = _extract_inline_image_from_response(data)
+        if raw_bytes is None:
+            log_api_call(f"batch_image_edit:{key}", False, "No image data in response")
+            continue
+
+        log_api_call(f"batch_image_edit:{key}", True, f"Image received ({len(raw_bytes)} bytes)")
+        results[key] = raw_bytes if skip_background_removal else strip_background_ai(raw_bytes)
+
+    return results
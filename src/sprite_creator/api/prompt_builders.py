@@ -6,6 +6,7 @@ Prompts are preserved exactly as originally written per user request.
 """
 
 import random
+from functools import lru_cache
 from typing import Dict, List, Optional
 
 from ..config import GENDER_ARCHETYPES, ARCHETYPES
@@ -742,12 +743,32 @@ def build_expression_prompt(
         "Make sure the head, arms, hair, hands, and clothes are all kept within the image."
     )
 
+# Anti-cover-up for swimwear: prevent Gemini from adding jackets/wraps over swimsuits
+_SWIMWEAR_KEYWORDS = ("bikini", "swimsuit", "one-piece", "tankini", "monokini", "swim", "bathing suit")
+_SWIMWEAR_SUFFIX = " This is swimwear only. Do not add any cover-ups, jackets, cardigans, wraps, sarongs, or layering pieces over the swimwear."
+
+
+@lru_cache(maxsize=None)
+def _outfit_prompt_scaffold(background_color: str) -> str:
+    """Static part of the outfit prompt that follows the description."""
+    bg = background_color.split("(")[0].strip()  # Extract color name (magenta or black)
+    return (
+        ", but don't change the size, proportions, framing, or art style of the character. "
+        "IMPORTANT: Keep the exact same hair length as the original. Do not make it any longer than it is, while adding some kind of styling that fits the new outfit. "
+        f"Give the character a {bg} background behind them. "
+        "Make sure the head, arms, hair, hands, and clothes are all kept within the image."
+    )
+
+
 def build_outfit_prompt(base_outfit_desc: str, gender_style: str, background_color: str = "black (#000000)") -> str:
     """
     Prompt to change clothing to base_outfit_desc on the given pose.
 
     NOTE: Prompt wording updated to avoid triggering safety filters while maintaining functionality.
 
+    The text around the description only depends on background_color and is
+    cached, since this is called on every retry of every outfit.
+
     Args:
         base_outfit_desc: Description of the outfit to generate.
         gender_style: 'f' or 'm' for gender-appropriate wording.
@@ -756,19 +777,15 @@ def build_outfit_prompt(base_outfit_desc: str, gender_style: str, background_col
     Returns:
         Prompt string for outfit generation.
     """
-    bg = background_color.split("(")[0].strip()  # Extract color name (magenta or black)
     prompt = (
-        f"Edit the character's clothes to match this description: {base_outfit_desc}, but don't change the size, proportions, framing, or art style of the character. "
-        "IMPORTANT: Keep the exact same hair length as the original. Do not make it any longer than it is, while adding some kind of styling that fits the new outfit. "
-        f"Give the character a {bg} background behind them. "
-        "Make sure the head, arms, hair, hands, and clothes are all kept within the image."
+        "Edit the character's clothes to match this description: "
+        + base_outfit_desc
+        + _outfit_prompt_scaffold(background_color)
     )
 
-    # Anti-cover-up for swimwear: prevent Gemini from adding jackets/wraps over swimsuits
-    SWIMWEAR_KEYWORDS = {"bikini", "swimsuit", "one-piece", "tankini", "monokini", "swim", "bathing suit"}
     desc_lower = base_outfit_desc.lower()
-    if any(kw in desc_lower for kw in SWIMWEAR_KEYWORDS):
-        prompt += " This is swimwear only. Do not add any cover-ups, jackets, cardigans, wraps, sarongs, or layering pieces over the swimwear."
+    if any(kw in desc_lower for kw in _SWIMWEAR_KEYWORDS):
+        prompt += _SWIMWEAR_SUFFIX
 
     return prompt
 
@@ -73,6 +73,10 @@ GEMINI_API_URL = (
     "https://generativelanguage.googleapis.com/v1beta/models/"
     f"{GEMINI_IMAGE_MODEL}:generateContent"
 )
+GEMINI_API_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+GEMINI_BATCH_API_URL = (
+    f"{GEMINI_API_BASE_URL}/models/{GEMINI_IMAGE_MODEL}:batchGenerateContent"
+)
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # DARK THEME COLOR SCHEME
@@ -4,9 +4,12 @@ Pose processing and outfit generation.
 Handles outfit generation, pose flattening, and character.yml writing.
 """
 
+import json
+import math
 import random
+import re
 import shutil
-from io import BytesIO
+from io import BytesIO, StringIO
 from pathlib import Path
 from typing import Callable, Dict, List, Optional, Tuple
 
@@ -15,6 +18,8 @@ from PIL import Image
 
 from ..api.exceptions import GeminiAPIError, GeminiSafetyError
 from ..api.gemini_client import (
+    ApiKeys,
+    call_gemini_batch_image_edit,
     call_gemini_image_edit,
     call_gemini_text_or_refs,
     load_image_as_base64,
@@ -39,6 +44,92 @@ from .image_utils import (
 )
 
 
+# Write character.yml with the built-in emitter below instead of yaml.dump.
+# Set to False to go back to PyYAML's serializer.
+USE_FAST_YAML_EMITTER = True
+
+# Strings matching this (and not a YAML 1.1 keyword) can be written unquoted
+_PLAIN_YAML_STR = re.compile(r"[A-Za-z_][A-Za-z0-9_ .-]*")
+_YAML_RESERVED_WORDS = {
+    "y", "yes", "n", "no", "true", "false", "on", "off", "null",
+}
+
+
+def _yaml_scalar(value) -> str:
+    """Format a scalar as YAML that reads back as the same value."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ".nan"
+        if math.isinf(value):
+            return ".inf" if value > 0 else "-.inf"
+        text = repr(value)
+        # YAML 1.1 only treats exponent notation as a float when it has a dot
+        if "e" in text and "." not in text:
+            text = text.replace("e", ".0e", 1)
+        return text
+    if isinstance(value, str):
+        if (
+            _PLAIN_YAML_STR.fullmatch(value)
+            and not value.endswith(" ")
+            and value.lower() not in _YAML_RESERVED_WORDS
+        ):
+            return value
+        # JSON strings are valid YAML double-quoted scalars
+        return json.dumps(value, ensure_ascii=False)
+    raise TypeError(f"Unsupported YAML scalar type: {type(value).__name__}")
+
+
+def _emit_yaml_block(value, out: StringIO, indent: int) -> None:
+    """Write a mapping or list in block style, matching yaml.dump's layout."""
+    pad = " " * indent
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(item, (dict, list)) and item:
+                out.write(f"{pad}{_yaml_scalar(key)}:\n")
+                # yaml.dump doesn't indent lists nested under a mapping key
+                _emit_yaml_block(item, out, indent + 2 if isinstance(item, dict) else indent)
+            else:
+                out.write(f"{pad}{_yaml_scalar(key)}: {_yaml_inline(item)}\n")
+    else:
+        for item in value:
+            if isinstance(item, (dict, list)) and item:
+                raise TypeError("Nested collections inside lists are not supported")
+            out.write(f"{pad}- {_yaml_inline(item)}\n")
+
+
+def _yaml_inline(value) -> str:
+    """Format a scalar or empty collection for use on a single line."""
+    if isinstance(value, dict):
+        return "{}"
+    if isinstance(value, list):
+        return "[]"
+    return _yaml_scalar(value)
+
+
+def _dump_yaml(data: dict) -> str:
+    """
+    Serialize a character.yml mapping to YAML text.
+
+    The organizer schema is a flat mapping plus small nested poses/lists, so a
+    direct emitter is much faster than yaml.dump. Falls back to yaml.dump for
+    anything it doesn't handle.
+    """
+    if USE_FAST_YAML_EMITTER:
+        out = StringIO()
+        try:
+            _emit_yaml_block(data, out, 0)
+            return out.getvalue()
+        except TypeError:
+            pass
+    return yaml.dump(data, sort_keys=False, allow_unicode=True)
+
+
 def write_character_yml(
     path: Path,
     display_name: str,
@@ -94,14 +185,24 @@ def write_character_yml(
         data["backup_id"] = backup_id
 
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
-        yaml.dump(data, f, sort_keys=False, allow_unicode=True)
+    path.write_text(_dump_yaml(data), encoding="utf-8")
 
     print(f"[INFO] Wrote character YAML to: {path}")
 
 
+def _save_png_as_rgba(image_bytes: bytes, out_path: Path) -> None:
+    """
+    Save image bytes to out_path as an uncompressed RGBA PNG.
+
+    rembg output is already RGBA, so the conversion copy is skipped in that case.
+    """
+    with BytesIO(image_bytes) as buf, Image.open(buf) as img:
+        rgba = img if img.mode == "RGBA" else img.convert("RGBA")
+        rgba.save(out_path, format="PNG", compress_level=0, optimize=False)
+
+
 def _generate_outfit_with_safety_recovery(
-    api_key: str,
+    api_key: ApiKeys,
     base_pose_path: Path,
     gender_style: str,
     outfit_key: str,
@@ -124,7 +225,7 @@ def _generate_outfit_with_safety_recovery(
     AI background removal is automatically applied unless skip_background_removal=True.
 
     Args:
-        api_key: Gemini API key.
+        api_key: Gemini API key, or a sequence of keys to rotate between.
         base_pose_path: Path to base pose image.
         gender_style: 'f' or 'm'.
         outfit_key: Outfit identifier.
@@ -240,7 +341,7 @@ def _generate_outfit_with_safety_recovery(
 
 
 def generate_single_outfit(
-    api_key: str,
+    api_key: ApiKeys,
     base_pose_path: Path,
     outfits_dir: Path,
     gender_style: str,
@@ -259,7 +360,7 @@ def generate_single_outfit(
     AI background removal is automatically applied.
 
     Args:
-        api_key: Gemini API key.
+        api_key: Gemini API key, or a sequence of keys to rotate between.
         base_pose_path: Path to base pose image.
         outfits_dir: Directory to save outfits.
         gender_style: 'f' or 'm'.
@@ -274,8 +375,7 @@ def generate_single_outfit(
         If for_interactive_review=False: Path to saved outfit, or None if failed.
         If for_interactive_review=True: (path, original_bytes, rembg_bytes, used_prompt), or None if failed.
     """
-    outfits_dir.mkdir(parents=True, exist_ok=True)
-
+    # outfits_dir is created by save_image_bytes_as_png when the image is saved
     config = outfit_prompt_config.get(outfit_key, {})
 
     # Special handling for standardized school uniform
@@ -362,7 +462,7 @@ def generate_single_outfit(
 
 
 def generate_standard_uniform_outfit(
-    api_key: str,
+    api_key: ApiKeys,
     base_pose_path: Path,
     outfits_dir: Path,
     gender_style: str,
@@ -379,7 +479,7 @@ def generate_standard_uniform_outfit(
     AI background removal is automatically applied.
 
     Args:
-        api_key: Gemini API key.
+        api_key: Gemini API key, or a sequence of keys to rotate between.
         base_pose_path: Path to base pose image.
         outfits_dir: Directory to save outfits.
         gender_style: 'f' or 'm'.
@@ -391,7 +491,6 @@ def generate_standard_uniform_outfit(
         If for_interactive_review=False: Path to saved uniform outfit.
         If for_interactive_review=True: (path, original_bytes, rembg_bytes).
     """
-    outfits_dir.mkdir(parents=True, exist_ok=True)
     # Use black background for clean AI removal
     background_color = "solid black (#000000)"
 
@@ -457,8 +556,55 @@ def generate_standard_uniform_outfit(
         return final_path
 
 
+def _generate_outfits_batch(
+    api_key: ApiKeys,
+    base_pose_path: Path,
+    gender_style: str,
+    outfit_descriptions: Dict[str, str],
+    outfit_prompt_config: Dict[str, Dict[str, Optional[str]]],
+    skip_background_removal: bool = False,
+) -> Dict[str, bytes]:
+    """
+    Generate prompt-based outfits through a single Gemini Batch API job.
+
+    Underwear in random mode (tiered retries) and the standardized uniform
+    are left out and keep using the per-outfit path.
+
+    Returns:
+        Dict mapping outfit keys to image bytes. Missing keys (blocked, failed,
+        or excluded) should be generated individually by the caller.
+    """
+    # Use black background for clean AI removal
+    background_color = "solid black (#000000)"
+    image_b64 = load_image_as_base64(base_pose_path)
+
+    batch_requests: List[Tuple[str, str, str]] = []
+    for key, desc in outfit_descriptions.items():
+        config = outfit_prompt_config.get(key, {})
+        if config.get("use_standard_uniform"):
+            continue
+        if key == "underwear" and config.get("use_random", True):
+            continue
+        prompt = build_outfit_prompt(desc, gender_style, background_color)
+        batch_requests.append((prompt, image_b64, key))
+
+    if not batch_requests:
+        return {}
+
+    print(f"[INFO] Submitting {len(batch_requests)} outfits as a Gemini batch job...")
+    try:
+        return call_gemini_batch_image_edit(
+            api_key,
+            batch_requests,
+            skip_background_removal=skip_background_removal,
+        )
+    except GeminiAPIError as e:
+        print(f"[WARN] Batch outfit generation failed, falling back to per-outfit requests: {e}")
+        return {}
+
+
 def generate_outfits_once(
-    api_key: str,
+    api_key: ApiKeys,
     base_pose_path: Path,
     outfits_dir: Path,
     gender_style: str,
@@ -468,6 +614,7 @@ def generate_outfits_once(
     include_base_outfit: bool = True,
     for_interactive_review: bool = False,
     progress_callback: Optional[Callable[[int, int, str], None]] = None,
+    batch_mode: bool = False,
 ) -> List[Path] | Tuple[List[Path], List[Tuple[bytes, bytes]], Dict[str, str]]:
     """
     Generate outfits for a pose.
@@ -479,7 +626,7 @@ def generate_outfits_once(
     AI background removal is automatically applied to all generated outfits.
 
     Args:
-        api_key: Gemini API key.
+        api_key: Gemini API key, or a sequence of keys to rotate between.
         base_pose_path: Path to base pose image.
         outfits_dir: Directory to save outfits.
         gender_style: 'f' or 'm'.
@@ -488,6 +635,9 @@ def generate_outfits_once(
         archetype_label: Character archetype.
         include_base_outfit: Whether to include base pose as an outfit.
         for_interactive_review: If True, return cleanup data for review UI.
+        batch_mode: If True, submit prompt-based outfits as one Gemini Batch API
+            job instead of one request each. Outfits the batch can't produce
+            fall back to the per-outfit path.
 
     Returns:
         If for_interactive_review=False: List of paths to generated outfit images.
@@ -509,18 +659,28 @@ def generate_outfits_once(
             # Run rembg without edge cleanup (user will apply cleanup in review UI)
             rembg_bytes = strip_background_ai(base_bytes, skip_edge_cleanup=True)
             # Save rembg result initially (may be updated after review)
-            base_img = Image.open(BytesIO(rembg_bytes)).convert("RGBA")
-            base_img.save(base_out_path, format="PNG", compress_level=0, optimize=False)
+            _save_png_as_rgba(rembg_bytes, base_out_path)
             paths.append(base_out_path)
             cleanup_data.append((base_bytes, rembg_bytes))
             # Base outfit has no prompt
         else:
             # Normal flow: full background removal with default edge cleanup
             processed_bytes = strip_background_ai(base_bytes)
-            base_img = Image.open(BytesIO(processed_bytes)).convert("RGBA")
-            base_img.save(base_out_path, format="PNG", compress_level=0, optimize=False)
+            _save_png_as_rgba(processed_bytes, base_out_path)
             paths.append(base_out_path)
 
+    # Batch mode: generate prompt-based outfits up front in one batch job
+    batch_results: Dict[str, bytes] = {}
+    if batch_mode:
+        batch_results = _generate_outfits_batch(
+            api_key,
+            base_pose_path,
+            gender_style,
+            outfit_descriptions,
+            outfit_prompt_config,
+            skip_background_removal=for_interactive_review,
+        )
+
     # Generate each selected outfit key
     total_outfits = len(outfit_descriptions)
     for idx, (key, desc) in enumerate(outfit_descriptions.items()):
@@ -528,6 +688,22 @@ def generate_outfits_once(
         if progress_callback:
             progress_callback(idx + 1, total_outfits, key)
 
+        if key in batch_results:
+            out_stem = outfits_dir / key.capitalize()
+            if for_interactive_review:
+                original_bytes = batch_results[key]
+                # Run rembg without edge cleanup (user will apply cleanup in review UI)
+                rembg_bytes = strip_background_ai(original_bytes, skip_edge_cleanup=True)
+                final_path = save_image_bytes_as_png(rembg_bytes, out_stem)
+                paths.append(final_path)
+                cleanup_data.append((original_bytes, rembg_bytes))
+                used_prompts[key] = desc
+            else:
+                final_path = save_image_bytes_as_png(batch_results[key], out_stem)
+                paths.append(final_path)
+            print(f"  Saved outfit '{key}' to: {final_path}")
+            continue
+
         # Create tier progress callback for underwear to report attempt numbers
         def _tier_cb(attempt: int, total: int, outfit=key) -> None:
             if progress_callback:
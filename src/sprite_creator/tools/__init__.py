@@ -11,8 +11,10 @@ Usage:
 """
 
 # Re-export commonly used functions for convenience
-from .tester import launch_sprite_tester
+from .tester import is_sprite_tester_running, launch_sprite_tester, launch_sprite_tester_async
 
 __all__ = [
+    "is_sprite_tester_running",
     "launch_sprite_tester",
+    "launch_sprite_tester_async",
 ]
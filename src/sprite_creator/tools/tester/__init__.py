@@ -9,22 +9,45 @@ The test project is generated on-demand and uses the exact same character
 loading code that Student Transfer uses (init -60/-50/-40 blocks).
 """
 
+import copy
+import functools
+import json
 import os
 import platform
+import re
 import shutil
 import subprocess
 import sys
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from operator import itemgetter
 from pathlib import Path
 from tkinter import messagebox
+from typing import Callable
 import tkinter as tk
 import yaml
-from PIL import Image as PILImage
 
 from .sdk_utils import SDK_VERSION, SDK_FOLDER_NAME, download_and_setup_sdk
+try:
+    # Header-only size reader, also shipped to the test project as a template
+    from .templates.pymage_size import get_image_size as _get_image_size
+except ImportError:
+    _get_image_size = None
 from ...config import get_resource_path
 from ...logging_utils import log_info, log_error, log_warning, log_debug
 
+# Prefer the libyaml-backed loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _YamlSafeLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlSafeLoader
+
+
+def _safe_load(stream):
+    """yaml.safe_load using the fastest available safe loader."""
+    return yaml.load(stream, Loader=_YamlSafeLoader)
+
 
 def _get_base_path() -> Path:
     """Get the base path for frozen or development mode."""
@@ -55,16 +78,22 @@ TEMPLATES_DIR = get_resource_path("tools/tester/templates")
 # Writable paths (for SDK and test project)
 WRITABLE_BASE = _get_writable_base()
 
-# Ensure writable base directory exists for frozen app
-try:
-    WRITABLE_BASE.mkdir(parents=True, exist_ok=True)
-    # Log at module load time (logging may not be initialized yet)
-    print(f"[Sprite Tester] Writable base: {WRITABLE_BASE}")
-except Exception as e:
-    print(f"[WARN] Could not create writable base directory {WRITABLE_BASE}: {e}")
 
-# Ren'Py SDK location - check environment variable first, then default
-SDK_DIR = Path(os.environ.get("RENPY_SDK_PATH", WRITABLE_BASE / SDK_FOLDER_NAME))
+@functools.cache
+def get_sdk_dir() -> Path:
+    """
+    Get the Ren'Py SDK location - RENPY_SDK_PATH if set, else under WRITABLE_BASE.
+
+    Resolved on first use rather than at import, which is also when the
+    writable base directory is created (needed for the frozen app).
+    """
+    try:
+        WRITABLE_BASE.mkdir(parents=True, exist_ok=True)
+        log_info(f"Sprite Tester writable base: {WRITABLE_BASE}")
+    except Exception as e:
+        log_warning(f"Could not create writable base directory {WRITABLE_BASE}: {e}")
+    return Path(os.environ.get("RENPY_SDK_PATH", WRITABLE_BASE / SDK_FOLDER_NAME))
+
 
 # Test project directory - use a temp directory for writable output
 def _get_test_project_dir() -> Path:
@@ -79,126 +108,262 @@ def _get_test_project_dir() -> Path:
 TEST_PROJECT_DIR = _get_test_project_dir()
 
 
+# Last executable found by find_renpy_executable
+_renpy_exe: Path | None = None
+
+
 def find_renpy_executable() -> Path | None:
-    """Find the Ren'Py executable for the current platform."""
-    if not SDK_DIR.exists():
+    """Find the Ren'Py executable for the current platform.
+
+    A found executable is remembered for the rest of the session and only
+    looked up again if it has since been removed. A failed lookup is not
+    remembered, so an SDK installed meanwhile is picked up.
+    """
+    global _renpy_exe
+    if _renpy_exe is not None and _renpy_exe.exists():
+        return _renpy_exe
+
+    _renpy_exe = None
+    sdk_dir = get_sdk_dir()
+    if not sdk_dir.exists():
         return None
 
     if platform.system() == "Windows":
-        exe = SDK_DIR / "renpy.exe"
+        exe = sdk_dir / "renpy.exe"
     else:
-        exe = SDK_DIR / "renpy.sh"
+        exe = sdk_dir / "renpy.sh"
 
-    return exe if exe.exists() else None
+    if exe.exists():
+        _renpy_exe = exe
+    return _renpy_exe
 
 
-def get_template_files() -> list[tuple[str, Path]]:
-    """Get list of template files to copy."""
-    files = [
-        ("character.py", TEMPLATES_DIR / "character.py"),
-        ("body.py", TEMPLATES_DIR / "body.py"),
-        ("char_sprites.py", TEMPLATES_DIR / "char_sprites.py"),
-        ("filtered_image.py", TEMPLATES_DIR / "filtered_image.py"),
-        ("pymage_size.py", TEMPLATES_DIR / "pymage_size.py"),
-        ("effects.rpy", TEMPLATES_DIR / "effects.rpy"),
-    ]
-    return [(name, path) for name, path in files if path.exists()]
+# Files copied from TEMPLATES_DIR into the test project's game folder
+TEMPLATE_FILE_NAMES = (
+    "character.py",
+    "body.py",
+    "char_sprites.py",
+    "filtered_image.py",
+    "pymage_size.py",
+    "effects.rpy",
+)
+
+
+@functools.lru_cache(maxsize=1)
+def get_template_files() -> tuple[tuple[str, Path], ...]:
+    """Get the template files to copy (cached, the templates are bundled)."""
+    # One directory read instead of a stat per template
+    try:
+        present = set(os.listdir(TEMPLATES_DIR))
+    except OSError:
+        return ()
+    return tuple(
+        (name, TEMPLATES_DIR / name) for name in TEMPLATE_FILE_NAMES if name in present
+    )
+
+
+@dataclass(slots=True)
+class ScanResult:
+    """Structure of a character folder, as discovered by scan_character_folder."""
+    poses: dict[str, dict] = field(default_factory=dict)  # pose -> {"outfits", "faces"}
+    outfits: list[str] = field(default_factory=list)  # Outfit names across all poses
+    expressions: list = field(default_factory=list)
+    sprite_size: tuple[int, int] = (832, 1248)  # Default, overwritten if we find an image
+
+
+# scan_character_folder results by folder: (stamps, result), where stamps are
+# the (path, mtime_ns) of every directory walked and of the probed image
+_SCAN_CACHE: dict[str, tuple[list[tuple[str, int]], ScanResult]] = {}
 
 
-def scan_character_folder(char_dir: Path) -> dict:
+def _stamps_current(stamps: list[tuple[str, int]]) -> bool:
+    """Check that none of the stamped paths changed since they were recorded."""
+    try:
+        return all(os.stat(path).st_mtime_ns == mtime for path, mtime in stamps)
+    except OSError:
+        return False
+
+
+def scan_character_folder(char_dir: Path) -> ScanResult:
     """
     Scan the character folder to discover all poses, outfits, and expressions.
     Also determines the sprite dimensions from the first image found.
-    Returns a dict with the discovered structure.
+    Returns a ScanResult with the discovered structure.
+
+    Results are cached until a scanned directory (or the probed image) changes,
+    so repeat launches of the tester skip the walk.
+    """
+    key = str(char_dir)
+    cached = _SCAN_CACHE.get(key)
+    if cached is not None and _stamps_current(cached[0]):
+        return copy.deepcopy(cached[1])
+
+    stamps: list[tuple[str, int]] = []
+    result = _scan_character_folder(char_dir, stamps)
+    _SCAN_CACHE[key] = (stamps, copy.deepcopy(result))
+    return result
+
+
+def _probe_image_size(path: str) -> tuple[int, int]:
+    """Read an image's dimensions from its header without decoding it."""
+    if _get_image_size is None:
+        # Only needed if the bundled reader is missing; PIL is slow to import
+        from PIL import Image as PILImage
+        with PILImage.open(path) as img:
+            return img.size
+    with open(path, "rb") as f:
+        return _get_image_size(f).get_dimensions()
+
+
+def _stamp(stamps: list[tuple[str, int]], path: str) -> None:
+    stamps.append((path, os.stat(path).st_mtime_ns))
+
+
+# Image extensions the tester picks up, lowercase and without the dot
+IMAGE_EXTENSIONS = frozenset({'png', 'jpg', 'jpeg', 'webp'})
+
+
+def _scan_pose_dir(pose_dir: str) -> tuple[dict, list[str], list[tuple[str, int]]]:
+    """Scan one pose directory.
+
+    Returns (pose_data, image_files, stamps), with image files in scan order.
+    Runs on a worker thread, so it only touches its own lists.
     """
-    result = {
-        "poses": {},
+    pose_data = {
         "outfits": [],
-        "expressions": [],
-        "sprite_size": (832, 1248),  # Default, will be overwritten if we find an image
+        "faces": {},
     }
-
-    first_image_found = False
-
-    # Scan for pose directories (single letters like 'a', 'b', 'c')
-    for item in char_dir.iterdir():
-        if item.is_dir() and len(item.name) == 1 and item.name.isalpha():
-            pose_name = item.name
-            pose_data = {
-                "outfits": [],
-                "faces": {},
-            }
-
-            # Scan outfits directory
-            outfits_dir = item / "outfits"
-            if outfits_dir.exists():
-                for outfit_file in outfits_dir.iterdir():
-                    if outfit_file.suffix.lower() in ('.png', '.jpg', '.jpeg', '.webp'):
-                        outfit_name = outfit_file.stem
-                        outfit_ext = outfit_file.suffix  # Store actual extension
-                        pose_data["outfits"].append((outfit_name, outfit_ext))
-                        if outfit_name not in result["outfits"]:
-                            result["outfits"].append(outfit_name)
-
-                        # Get image dimensions from first image found
-                        if not first_image_found:
-                            try:
-                                with PILImage.open(outfit_file) as img:
-                                    result["sprite_size"] = img.size
-                                first_image_found = True
-                            except Exception:
-                                pass
-
-            # Scan faces directory
-            faces_dir = item / "faces"
-            if faces_dir.exists():
-                for face_subdir in faces_dir.iterdir():
-                    if face_subdir.is_dir():
-                        outfit_name = face_subdir.name
-                        if outfit_name == "face":
-                            outfit_name = ""  # Base outfit
-
-                        expressions = []
-                        for expr_file in face_subdir.iterdir():
-                            if expr_file.suffix.lower() in ('.png', '.jpg', '.jpeg', '.webp'):
-                                try:
-                                    expr_idx = int(expr_file.stem)
-                                    expr_ext = expr_file.suffix  # Store actual extension
-                                    expressions.append((expr_idx, expr_ext))
-
-                                    # Get image dimensions from first image found
-                                    if not first_image_found:
-                                        try:
-                                            with PILImage.open(expr_file) as img:
-                                                result["sprite_size"] = img.size
-                                            first_image_found = True
-                                        except Exception:
-                                            pass
-                                except ValueError:
-                                    pass
-
-                        if expressions:
-                            # Sort by index, preserving the extension
-                            pose_data["faces"][outfit_name] = sorted(expressions, key=lambda x: x[0])
-
-            result["poses"][pose_name] = pose_data
+    image_files = []
+    stamps = []
+    _stamp(stamps, pose_dir)
+
+    # Scan outfits directory
+    outfits_dir = os.path.join(pose_dir, "outfits")
+    if os.path.isdir(outfits_dir):
+        _stamp(stamps, outfits_dir)
+        with os.scandir(outfits_dir) as outfit_entries:
+            for outfit_file in outfit_entries:
+                outfit_name, _, ext = outfit_file.name.rpartition('.')
+                if not outfit_name or ext.lower() not in IMAGE_EXTENSIONS:
+                    continue
+                # Store actual extension
+                pose_data["outfits"].append((outfit_name, '.' + ext))
+                image_files.append(outfit_file.path)
+
+    # Scan faces directory
+    faces_dir = os.path.join(pose_dir, "faces")
+    if os.path.isdir(faces_dir):
+        _stamp(stamps, faces_dir)
+        with os.scandir(faces_dir) as face_subdirs:
+            for face_subdir in face_subdirs:
+                if not face_subdir.is_dir():
+                    continue
+                _stamp(stamps, face_subdir.path)
+                outfit_name = face_subdir.name
+                if outfit_name == "face":
+                    outfit_name = ""  # Base outfit
+
+                expressions = []
+                with os.scandir(face_subdir.path) as expr_entries:
+                    for expr_file in expr_entries:
+                        expr_stem, _, ext = expr_file.name.rpartition('.')
+                        if not expr_stem or ext.lower() not in IMAGE_EXTENSIONS:
+                            continue
+                        try:
+                            expr_idx = int(expr_stem)
+                        except ValueError:
+                            continue
+                        # Store actual extension
+                        expressions.append((expr_idx, '.' + ext))
+                        image_files.append(expr_file.path)
+
+                if expressions:
+                    # Sort by index, preserving the extension
+                    pose_data["faces"][outfit_name] = sorted(expressions, key=itemgetter(0))
+
+    return pose_data, image_files, stamps
+
+
+def _scan_character_folder(char_dir: Path, stamps: list[tuple[str, int]]) -> ScanResult:
+    """Walk char_dir for scan_character_folder, recording stamps as it goes."""
+    result = ScanResult()
+
+    # Find pose directories (single letters like 'a', 'b', 'c')
+    _stamp(stamps, str(char_dir))
+    with os.scandir(char_dir) as pose_entries:
+        pose_dirs = [
+            (item.name, item.path) for item in pose_entries
+            if item.is_dir() and len(item.name) == 1 and item.name.isalpha()
+        ]
+
+    # Poses are independent, so list them concurrently; map() keeps the order
+    if len(pose_dirs) > 1:
+        with ThreadPoolExecutor(max_workers=min(len(pose_dirs), os.cpu_count() or 1)) as pool:
+            scans = list(pool.map(_scan_pose_dir, [path for _, path in pose_dirs]))
+    else:
+        scans = [_scan_pose_dir(path) for _, path in pose_dirs]
+
+    # Images in scan order; only the first readable one is opened for its size
+    image_files = []
+    outfits_seen = set()
+    for (pose_name, _), (pose_data, pose_images, pose_stamps) in zip(pose_dirs, scans):
+        for outfit_name, _ in pose_data["outfits"]:
+            if outfit_name not in outfits_seen:
+                outfits_seen.add(outfit_name)
+                result.outfits.append(outfit_name)
+        result.poses[pose_name] = pose_data
+        image_files.extend(pose_images)
+        stamps.extend(pose_stamps)
+
+    # Get image dimensions from first image found
+    for image_file in image_files:
+        try:
+            result.sprite_size = _probe_image_size(image_file)
+            _stamp(stamps, image_file)
+            break
+        except Exception:
+            pass
 
     return result
 
 
+_VAR_NAME_SEPARATORS = str.maketrans({"-": "_", " ": "_"})
+_INVALID_VAR_CHARS_RE = re.compile(r'[^a-zA-Z0-9_]')
+
+
 def sanitize_var_name(name: str) -> str:
     """Convert a name to a valid Python variable name."""
-    import re
     # Replace hyphens and spaces with underscores
-    sanitized = name.replace("-", "_").replace(" ", "_")
+    sanitized = name.translate(_VAR_NAME_SEPARATORS)
     # Remove any other invalid characters
-    sanitized = re.sub(r'[^a-zA-Z0-9_]', '', sanitized)
+    sanitized = _INVALID_VAR_CHARS_RE.sub('', sanitized)
     # Ensure it doesn't start with a number
     if sanitized and sanitized[0].isdigit():
         sanitized = "_" + sanitized
     return sanitized
 
 
+# script.rpy template of the test project; see _load_script_template
+SCRIPT_TEMPLATE_NAME = "test_script.rpy.tmpl"
+
+
+@functools.lru_cache(maxsize=1)
+def _load_script_template() -> str:
+    """Read the script.rpy template once per process.
+
+    Fields are filled with str.format_map, so literal braces in the Ren'Py
+    code are doubled.
+    """
+    return (TEMPLATES_DIR / SCRIPT_TEMPLATE_NAME).read_text(encoding="utf-8")
+
+
+# Registration lines of the generated script, filled with % formatting
+_POSE_TMPL = '    body.add_pose(Pose("%s", (%d, %d), (%d, %d), %d))'
+_OUTFIT_TMPL = '    body.add_outfit("%s", "%s", "%s%s%s")'
+_FACE_TMPL = '    body.add_face("%s", "%s", %s, False, "%s%s%s")'
+_FACE_QUALIFIER_TMPL = 'BodyImageQualifier(body, {"$": "%s"})'
+
+
 def generate_test_script(char_name: str, char_data: dict, char_dir: Path) -> str:
     """
     Generate the script.rpy content for the test project.
@@ -224,400 +389,265 @@ def generate_test_script(char_name: str, char_data: dict, char_dir: Path) -> str
     folder_data = scan_character_folder(char_dir)
 
     # Get actual sprite dimensions
-    sprite_width, sprite_height = folder_data["sprite_size"]
+    sprite_width, sprite_height = folder_data.sprite_size
     sprite_center_x = sprite_width // 2
     # Use a reasonable anchor point near the top of the head
     sprite_center_y = int(sprite_height * 0.08)
 
     # Build outfit and expression lists
-    all_outfits = folder_data["outfits"]
-    first_pose = list(folder_data["poses"].keys())[0] if folder_data["poses"] else "a"
+    all_outfits = folder_data.outfits
 
     # Generate the outfit registration code
+    poses = folder_data.poses
     outfit_registrations = []
     face_registrations = []
 
-    for pose_name, pose_data in folder_data["poses"].items():
-        for outfit_name, outfit_ext in pose_data["outfits"]:
-            outfit_path = f"images/characters/{char_name}/{pose_name}/outfits/{outfit_name}{outfit_ext}"
-            outfit_registrations.append(f'    body.add_outfit("{pose_name}", "{outfit_name}", "{outfit_path}")')
+    for pose_name, pose_data in poses.items():
+        # Path prefixes are shared by every image of a pose/face folder
+        pose_prefix = "images/characters/%s/%s/" % (char_name, pose_name)
+        outfit_prefix = pose_prefix + "outfits/"
+        outfit_registrations.extend(
+            _OUTFIT_TMPL % (pose_name, outfit_name, outfit_prefix, outfit_name, outfit_ext)
+            for outfit_name, outfit_ext in pose_data["outfits"]
+        )
 
         for face_outfit, expressions in pose_data["faces"].items():
-            face_folder = "face" if not face_outfit else face_outfit
-            for expr_idx, expr_ext in expressions:
-                face_path = f"images/characters/{char_name}/{pose_name}/faces/{face_folder}/{expr_idx}{expr_ext}"
-                if face_outfit:
-                    face_registrations.append(
-                        f'    body.add_face("{pose_name}", "{expr_idx}", BodyImageQualifier(body, {{"$": "{face_outfit}"}}), False, "{face_path}")'
-                    )
-                else:
-                    face_registrations.append(
-                        f'    body.add_face("{pose_name}", "{expr_idx}", BodyImageQualifier(body), False, "{face_path}")'
-                    )
+            if face_outfit:
+                face_prefix = pose_prefix + "faces/" + face_outfit + "/"
+                qualifier = _FACE_QUALIFIER_TMPL % face_outfit
+            else:
+                face_prefix = pose_prefix + "faces/face/"
+                qualifier = "BodyImageQualifier(body)"
+            face_registrations.extend(
+                _FACE_TMPL % (pose_name, expr_idx, qualifier, face_prefix, expr_idx, expr_ext)
+                for expr_idx, expr_ext in expressions
+            )
 
     outfit_code = "\n".join(outfit_registrations) if outfit_registrations else "    pass"
     face_code = "\n".join(face_registrations) if face_registrations else "    pass"
 
     # Build pose creation code
-    pose_creations = []
-    for pose_name in folder_data["poses"].keys():
-        facing = poses_config.get(pose_name, {}).get("facing", "right")
-        direction = 1 if facing == "right" else -1
-        pose_creations.append(
-            f'    body.add_pose(Pose("{pose_name}", ({sprite_width}, {sprite_height}), ({sprite_center_x}, {sprite_center_y}), {direction}))'
-        )
-    pose_code = "\n".join(pose_creations) if pose_creations else f'    body.add_pose(Pose("a", ({sprite_width}, {sprite_height}), ({sprite_center_x}, {sprite_center_y}), 1))'
-
-    script = f'''# Auto-generated test script for sprite validation
-# Character: {char_name}
-# Uses the exact same pattern as Student Transfer
-
-# ============================================================================
-# GUI Init - Set screen resolution to match Student Transfer (1280x720)
-# ============================================================================
-
-init python:
-    gui.init(1280, 720)
-
-# ============================================================================
-# Config - Disable developer mode and quit confirmation for clean testing
-# ============================================================================
-
-init -100 python:
-    config.developer = False
-    config.quit_action = Quit(confirm=False)
-    # Skip the main menu and go directly to the game
-    config.main_menu_music = None
-
-# Skip main menu - jump directly to start
-label main_menu:
-    jump start
-
-# ============================================================================
-# Body Setup (init -50, same as ST)
-# ============================================================================
-
-init -50 python:
-    from body import Body, Pose, BodyImageQualifier
-    from filtered_image import FilterProperties
-    from renpy.character import ADVCharacter
-
-    # Initialize screenfilter (required by char_sprites.py)
-    screenfilter = FilterProperties()
-
-    # Create base ADV character (template for Person characters)
-    adv = ADVCharacter(None)
-
-    # Required store variables for standalone operation
-    coordinate_grid_key_presses = 0
-    phone_images = []
-    protagonist = ""
-
-    # Character storage (same as ST)
-    bodies = {{}}
-    characters = {{}}
-    all_emotions = set()
-    all_outfits = set()
-
-    # Create Body for {char_name}
-    body = Body(
-        color="{name_color}",
-        scale={scale},
-        voice=None,
-        default_outfit="{all_outfits[0] if all_outfits else ''}",
-        eye_line={eye_line}
-    )
+    facing_map = {
+        name: 1 if (poses_config.get(name) or {}).get("facing", "right") == "right" else -1
+        for name in poses
+    }
+    pose_creations = [
+        _POSE_TMPL % (
+            pose_name, sprite_width, sprite_height, sprite_center_x, sprite_center_y,
+            facing_map[pose_name])
+        for pose_name in poses
+    ]
+    pose_code = "\n".join(pose_creations) if pose_creations else _POSE_TMPL % (
+        "a", sprite_width, sprite_height, sprite_center_x, sprite_center_y, 1)
+
+    fields = {
+        "char_name": char_name,
+        "var_name": var_name,
+        "display_name": display_name,
+        "name_color": name_color,
+        "scale": scale,
+        "eye_line": eye_line,
+        "default_outfit": all_outfits[0] if all_outfits else '',
+        "sprite_width": sprite_width,
+        "sprite_height": sprite_height,
+        "pose_code": pose_code,
+        "outfit_code": outfit_code,
+        "face_code": face_code,
+    }
+    return _load_script_template().format_map(fields)
 
-    # Add poses
-{pose_code}
 
-    # Add outfits
-{outfit_code}
+# Names skipped when copying a character folder: Windows reserved device
+# names (with or without an extension) and legacy _backups folders
+COPY_SKIP_NAMES = frozenset({
+    "con", "prn", "aux", "nul", "_backups",
+    *(f"com{i}" for i in range(1, 10)),
+    *(f"lpt{i}" for i in range(1, 10)),
+})
 
-    # Add faces (expressions)
-{face_code}
 
-    # Set body size and register
-    body.set_size({sprite_width}, {sprite_height})
-    for pose in body.poses.values():
-        pose.init_size({sprite_center_x}, {sprite_height})
+def _ignore_reserved(directory, contents):
+    """Skip files/dirs with Windows reserved device names or legacy _backups."""
+    return {name for name in contents
+            if name.lower() in COPY_SKIP_NAMES
+            or Path(name).stem.lower() in COPY_SKIP_NAMES}
 
-    bodies["{var_name}"] = body
-    characters["{var_name}"] = "{display_name}"
-    all_outfits.update(body.all_outfits)
-    # Populate all_emotions from body.all_expressions (ST pattern)
-    all_emotions.update(body.all_expressions)
 
-# ============================================================================
-# Person Creation (init -40, same as ST)
-# ============================================================================
+def _fast_copytree(src: Path, dst: Path) -> None:
+    """
+    Copy a directory tree, skipping COPY_SKIP_NAMES.
 
-init -40 python:
-    from char_sprites import Person
+    On Windows this uses multi-threaded robocopy, which is much faster than
+    shutil.copytree for folders with many images. Elsewhere (or if robocopy
+    fails) shutil.copytree is used; on Linux/macOS it already copies file
+    contents in the kernel (sendfile/fcopyfile).
+    """
+    if platform.system() == "Windows":
+        excludes = [pattern for name in sorted(COPY_SKIP_NAMES) for pattern in (name, f"{name}.*")]
+        try:
+            result = subprocess.run(
+                ["robocopy", str(src), str(dst), "/E", "/MT:8",
+                 "/NDL", "/NFL", "/NJH", "/NJS", "/NP",
+                 "/XD", *excludes, "/XF", *excludes],
+                capture_output=True,
+                check=False,
+                creationflags=subprocess.CREATE_NO_WINDOW,
+            )
+            # robocopy exit codes below 8 mean success (bit flags for copied/extra files)
+            if result.returncode < 8:
+                return
+            log_warning(f"robocopy failed with code {result.returncode}, falling back to copytree")
+        except OSError as e:
+            log_warning(f"robocopy unavailable ({e}), falling back to copytree")
 
-    {var_name} = Person("{var_name}", "{display_name}", "{var_name}")
+    shutil.copytree(src, dst, ignore=_ignore_reserved, dirs_exist_ok=True)
 
-# ============================================================================
-# Image Registration (init -30, same as ST's script.rpy)
-# ============================================================================
 
-init -30 python:
-    from char_sprites import CharacterSprite, define_sprite
+# Records the source (size, mtime_ns) of every file copied into the test
+# project's game folder, so unchanged files are not copied again
+MANIFEST_NAME = ".manifest.json"
+# Records which copied templates have already been patched
+PATCHED_SENTINEL_NAME = ".patched"
 
-    # Register images for each character/emotion combination (exactly like ST)
-    for person_name in characters.keys():
-        for emotion in all_emotions:
-            define_sprite((person_name, emotion), CharacterSprite(person_name, emotion, False))
-            define_sprite((person_name, emotion, 'blush'), CharacterSprite(person_name, emotion, True))
 
-# ============================================================================
-# Test Variables
-# ============================================================================
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write a file via a temporary sibling and os.replace, so it is never left half-written."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
 
-init python:
-    # Exchange transition (from ST effects.rpy)
-    renpy.store.exchange = {{"master": Dissolve(0.18)}}
 
-    # Background options: (display_name, is_solid, color_or_path)
-    # Solid colors first, then image backgrounds from backgrounds/ folder
-    test_backgrounds = [
-        ("Black", True, "#1a1a2e"),
-        ("White", True, "#ffffff"),
-        ("Gray", True, "#808080"),
-    ]
+def _load_manifest(path: Path) -> dict[str, list[int]]:
+    """Load the copy manifest, or an empty one if missing or unreadable."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def _walk_character_files(char_dir: Path) -> list[tuple[str, str]]:
+    """List (relative posix path, source path) for a character folder, skipping COPY_SKIP_NAMES."""
+    files = []
+    for root, dirs, names in os.walk(char_dir):
+        skipped = _ignore_reserved(root, dirs + names)
+        dirs[:] = [d for d in dirs if d not in skipped]
+        rel_root = os.path.relpath(root, char_dir).replace(os.sep, "/")
+        prefix = "" if rel_root == "." else rel_root + "/"
+        files.extend((prefix + name, os.path.join(root, name))
+                     for name in names if name not in skipped)
+    return files
+
+
+def _copy_file(src, dst) -> None:
+    """
+    Copy file contents, using copy_file_range where available (Linux 4.5+).
 
-    # Add image backgrounds (will be loaded at runtime)
-    import os
-    bg_dir = os.path.join(config.gamedir, "backgrounds")
-    if os.path.isdir(bg_dir):
-        for fname in sorted(os.listdir(bg_dir)):
-            if fname.lower().endswith((".png", ".jpg", ".jpeg", ".webp")):
-                display_name = os.path.splitext(fname)[0].replace("_", " ").title()
-                bg_path = "backgrounds/" + fname
-                test_backgrounds.append((display_name, False, bg_path))
-
-    current_bg_idx = 0
-
-    def get_current_bg_name():
-        return test_backgrounds[current_bg_idx][0] if test_backgrounds else "Black"
-
-    def cycle_background(direction):
-        global current_bg_idx
-        current_bg_idx = (current_bg_idx + direction) % len(test_backgrounds)
-        update_background()
-
-    def update_background():
-        bg_name, is_solid, value = test_backgrounds[current_bg_idx]
-        if is_solid:
-            renpy.scene()
-            renpy.show("bg_solid", what=Solid(value))
-        else:
-            renpy.scene()
-            renpy.show("bg_image", what=Image(value))
-        # Re-show the character on top
-        update_sprite_no_transition()
-        renpy.restart_interaction()
-
-    def update_sprite_no_transition():
-        # Show sprite without transition (used after background change)
-        {var_name}.outfit = get_current_outfit()
-        renpy.show("{var_name} " + get_current_emotion(), at_list=[sprite_center])
-
-    # Test state
-    test_char_name = "{var_name}"
-    test_poses = sorted(bodies["{var_name}"].poses.keys()) if "{var_name}" in bodies else ["a"]
-    current_pose_idx = 0
-    current_expr_idx = 0
-    current_outfit_idx = 0
-
-    def get_current_pose():
-        return test_poses[current_pose_idx] if test_poses else "a"
-
-    def get_outfit_list():
-        """Get list of outfits available for current pose."""
-        pose_name = get_current_pose()
-        body = bodies.get("{var_name}")
-        if body and pose_name in body.poses:
-            return sorted(body.poses[pose_name].outfits.keys())
-        return []
-
-    def get_current_outfit():
-        """Get the currently selected outfit name."""
-        outfits = get_outfit_list()
-        if outfits and current_outfit_idx < len(outfits):
-            return outfits[current_outfit_idx]
-        elif outfits:
-            return outfits[0]
-        return ""
-
-    def get_expression_keys():
-        """Get sorted list of actual expression keys (e.g., [0, 1, 7, 14]) for current pose."""
-        pose_name = get_current_pose()
-        body = bodies.get("{var_name}")
-        if body and pose_name in body.poses:
-            # Get actual expression keys, sorted numerically
-            keys = sorted(body.poses[pose_name].faces.keys(), key=lambda x: int(x) if str(x).isdigit() else 999)
-            return keys if keys else [0]
-        return [0]
-
-    def get_current_expression_key():
-        """Get the actual expression key at current_expr_idx."""
-        keys = get_expression_keys()
-        if current_expr_idx < len(keys):
-            return keys[current_expr_idx]
-        return keys[0] if keys else 0
-
-    def get_current_emotion():
-        return "{{}}_{{}}".format(get_current_pose(), get_current_expression_key())
-
-    def cycle_pose(direction):
-        global current_pose_idx, current_expr_idx, current_outfit_idx
-        # Remember current expression KEY before changing pose
-        old_outfit = get_current_outfit()
-        old_expr_key = get_current_expression_key()
-        current_pose_idx = (current_pose_idx + direction) % len(test_poses)
-        # Try to keep same outfit if it exists in new pose
-        new_outfits = get_outfit_list()
-        if old_outfit in new_outfits:
-            current_outfit_idx = new_outfits.index(old_outfit)
-        else:
-            current_outfit_idx = 0
-        # Try to keep same expression KEY if it exists in new pose
-        new_keys = get_expression_keys()
-        if old_expr_key in new_keys:
-            current_expr_idx = new_keys.index(old_expr_key)
-        else:
-            # Fall back to expression 0 if it exists, otherwise first available
-            if 0 in new_keys:
-                current_expr_idx = new_keys.index(0)
-            else:
-                current_expr_idx = 0
-        update_sprite()
-
-    def cycle_expression(direction):
-        global current_expr_idx
-        keys = get_expression_keys()
-        current_expr_idx = (current_expr_idx + direction) % len(keys)
-        update_sprite()
-
-    def cycle_outfit(direction):
-        global current_outfit_idx
-        outfits = get_outfit_list()
-        if outfits:
-            current_outfit_idx = (current_outfit_idx + direction) % len(outfits)
-            update_sprite()
-
-    def update_sprite():
-        # Update outfit and show new sprite with exchange transition
-        {var_name}.outfit = get_current_outfit()
-        renpy.show("{var_name} " + get_current_emotion(), at_list=[sprite_center])
-        renpy.with_statement(exchange)
-        renpy.restart_interaction()
-
-# ============================================================================
-# Character Transform (bottom-center positioning like ST)
-# ============================================================================
-
-transform sprite_center:
-    xalign 0.5
-    yalign 1.0
-
-# ============================================================================
-# Test Screen (simplified controls)
-# ============================================================================
-
-screen sprite_test():
-    # Modal screen to capture all keyboard/mouse input
-    modal True
-
-    # Note: No solid background here - let the sprite show through
-    # The sprite is shown on the master layer before this screen is called
-
-    # Info panel
-    frame:
-        xalign 0.5
-        ypos 20
-        padding (20, 10)
-        background Frame(Solid("#2d2d44"), 5, 5)
-
-        vbox:
-            spacing 5
-            text "Sprite Tester" size 24 color "#ffffff" xalign 0.5
-            text "Character: {display_name}" size 18 color "#aaaaaa" xalign 0.5
-            hbox:
-                xalign 0.5
-                spacing 20
-                text "Pose: [get_current_pose()]" size 16 color "#88ff88"
-                text "Outfit: [get_current_outfit()]" size 16 color "#88ff88"
-                text "Expression: [get_current_expression_key()]" size 16 color "#88ff88"
-            hbox:
-                xalign 0.5
-                spacing 20
-                text "Emotion: [get_current_emotion()]" size 14 color "#ffff88"
-                text "Background: [get_current_bg_name()]" size 14 color "#88ffff"
-
-    # Controls
-    frame:
-        xalign 0.5
-        yalign 1.0
-        yoffset -20
-        padding (20, 15)
-        background Frame(Solid("#2d2d44"), 5, 5)
-
-        vbox:
-            spacing 10
-            hbox:
-                xalign 0.5
-                spacing 12
-                textbutton "< Pose" action Function(cycle_pose, -1)
-                textbutton "Pose >" action Function(cycle_pose, 1)
-                null width 10
-                textbutton "< Outfit" action Function(cycle_outfit, -1)
-                textbutton "Outfit >" action Function(cycle_outfit, 1)
-                null width 10
-                textbutton "< Expr" action Function(cycle_expression, -1)
-                textbutton "Expr >" action Function(cycle_expression, 1)
-                null width 10
-                textbutton "< BG" action Function(cycle_background, -1)
-                textbutton "BG >" action Function(cycle_background, 1)
-
-            text "L/R=Pose | Home/End=Outfit | U/D=Expr | PgUp/Dn=BG | Esc=Exit" size 13 color "#888888" xalign 0.5
-            textbutton "Exit" action Return(True) xalign 0.5
-
-    # Keyboard shortcuts (pygame key constants)
-    key "K_LEFT" action Function(cycle_pose, -1)
-    key "K_RIGHT" action Function(cycle_pose, 1)
-    key "K_HOME" action Function(cycle_outfit, -1)
-    key "K_END" action Function(cycle_outfit, 1)
-    key "K_UP" action Function(cycle_expression, 1)
-    key "K_DOWN" action Function(cycle_expression, -1)
-    key "K_PAGEUP" action Function(cycle_background, -1)
-    key "K_PAGEDOWN" action Function(cycle_background, 1)
-    key "K_ESCAPE" action Return(True)
-
-# ============================================================================
-# Main Label
-# ============================================================================
-
-label start:
-    # Set initial background (uses test_backgrounds[0])
-    $ bg_name, is_solid, value = test_backgrounds[current_bg_idx]
-    if is_solid:
-        scene expression Solid(value)
-    else:
-        scene expression Image(value)
+    copy_file_range lets the kernel copy (or reflink, on btrfs/XFS) without
+    moving the data through user space. Otherwise, or if the filesystem
+    refuses it, shutil.copyfile is used, which already falls back to
+    sendfile (Linux) or fcopyfile (macOS).
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+                remaining = os.fstat(src_fd).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(src_fd, dst_fd, remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining <= 0:
+                return
+        except OSError:
+            pass
+    shutil.copyfile(src, dst)
+
+
+def _copy_with_times(src_path, dst_path: str, st: os.stat_result) -> None:
+    """Copy a file and set its times from st, rather than copy2 stat-ing the source again."""
+    _copy_file(src_path, dst_path)
+    os.utime(dst_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def _sync_files(dst_dir: Path, sources: dict[str, str | os.DirEntry], old_manifest: dict[str, list[int]],
+                pool: ThreadPoolExecutor, fresh_prefix: str | None = None) -> dict[str, list[int]]:
+    """
+    Copy sources into dst_dir, skipping files unchanged since the last sync.
 
-    # Set initial outfit and show character
-    $ {var_name}.outfit = get_current_outfit()
-    $ renpy.show("{var_name} " + get_current_emotion(), at_list=[sprite_center])
+    Args:
+        dst_dir: Destination root
+        sources: Relative posix path under dst_dir -> source file path, or a
+            scandir entry whose cached stat is reused
+        old_manifest: Manifest from the previous sync
+        pool: Executor the copies run on (they are I/O bound)
+        fresh_prefix: Relative path prefix of files already copied in bulk
 
-    # Show the test screen - it stays up until Exit is pressed
-    # Navigation buttons update the sprite directly via update_sprite()
-    call screen sprite_test()
+    Returns:
+        The new manifest
+    """
+    new_manifest = {}
+    to_copy = []
+    unchanged = 0
+    # Plain string paths: this runs once per file in the project
+    dst_root = str(dst_dir)
+    made_dirs = set()
+    for rel_path, src_path in sources.items():
+        st = src_path.stat() if isinstance(src_path, os.DirEntry) else os.stat(src_path)
+        signature = [st.st_size, st.st_mtime_ns]
+        new_manifest[rel_path] = signature
+        if fresh_prefix and rel_path.startswith(fresh_prefix):
+            continue
+        dst_path = os.path.join(dst_root, rel_path)
+        if old_manifest.get(rel_path) == signature and os.path.exists(dst_path):
+            unchanged += 1
+            continue
+        # Directories are created here so the parallel copies never race on them
+        parent = os.path.dirname(dst_path)
+        if parent not in made_dirs:
+            os.makedirs(parent, exist_ok=True)
+            made_dirs.add(parent)
+        to_copy.append((src_path, dst_path, st))
+
+    # list() waits for every copy and re-raises the first failure
+    list(pool.map(_copy_with_times, *zip(*to_copy)))
+
+    # Remove files from the previous sync whose source is gone (e.g. another character)
+    stale = old_manifest.keys() - new_manifest.keys()
+    stale_dirs = set()
+    for rel_path in stale:
+        stale_path = os.path.join(dst_root, rel_path)
+        try:
+            os.remove(stale_path)
+        except FileNotFoundError:
+            pass
+        stale_dirs.add(os.path.dirname(stale_path))
+
+    # Prune the directories those files leave empty, deepest first, up to dst_root
+    for dir_path in sorted(stale_dirs, key=len, reverse=True):
+        while dir_path != dst_root and dir_path.startswith(dst_root):
+            try:
+                os.rmdir(dir_path)
+            except OSError:
+                break  # Not empty (or already gone via a deeper path)
+            dir_path = os.path.dirname(dir_path)
+
+    log_info(f"Synced test project: {len(to_copy)} copied, {len(stale)} removed, "
+             f"{unchanged} up to date")
+    return new_manifest
+
+
+def _head_contains(path: Path, marker: bytes, size: int = 8192) -> bool:
+    """
+    Check whether a file's first `size` bytes contain marker.
 
-    return
-'''
-    return script
+    Used to spot templates patched on a previous run (the patches go near
+    the top) without reading the whole file.
+    """
+    with open(path, 'rb') as f:
+        return marker in f.read(size)
 
 
 def create_test_project(char_dir: Path) -> Path | None:
@@ -636,7 +666,7 @@ def create_test_project(char_dir: Path) -> Path | None:
     # Load character data
     try:
         with open(char_yml, 'r', encoding='utf-8') as f:
-            char_data = yaml.safe_load(f)
+            char_data = _safe_load(f)
     except Exception as e:
         print(f"[ERROR] Failed to read character.yml: {e}")
         messagebox.showerror("Error", f"Failed to read character.yml:\n{e}")
@@ -648,9 +678,13 @@ def create_test_project(char_dir: Path) -> Path | None:
     game_dir = TEST_PROJECT_DIR / "game"
     images_dir = game_dir / "images" / "characters"
 
-    # Clean and recreate
+    manifest_path = TEST_PROJECT_DIR / MANIFEST_NAME
+    old_manifest = _load_manifest(manifest_path)
+
+    # Create the project structure; existing files are kept and synced below,
+    # unless there is no manifest saying what they are
     try:
-        if TEST_PROJECT_DIR.exists():
+        if not old_manifest and TEST_PROJECT_DIR.exists():
             shutil.rmtree(TEST_PROJECT_DIR)
         images_dir.mkdir(parents=True, exist_ok=True)
     except Exception as e:
@@ -658,7 +692,6 @@ def create_test_project(char_dir: Path) -> Path | None:
         messagebox.showerror("Error", f"Failed to create test project directory:\n{TEST_PROJECT_DIR}\n\n{e}")
         return None
 
-    # Copy template files
     template_files = get_template_files()
     if not template_files:
         print(f"[ERROR] No template files found in {TEMPLATES_DIR}")
@@ -669,81 +702,94 @@ def create_test_project(char_dir: Path) -> Path | None:
         )
         return None
 
-    for filename, src_path in template_files:
-        dst_path = game_dir / filename
-        shutil.copy2(src_path, dst_path)
-        print(f"[INFO] Copied template: {filename}")
+    # Everything copied into game/: templates, preview backgrounds, character folder
+    sources = {filename: str(src_path) for filename, src_path in template_files}
 
-    # Copy background files for preview
     backgrounds_src = get_resource_path("data/reference_sprites/backgrounds")
-    backgrounds_dst = game_dir / "backgrounds"
     if backgrounds_src.exists():
-        backgrounds_dst.mkdir(parents=True, exist_ok=True)
-        for bg_file in backgrounds_src.iterdir():
-            if bg_file.suffix.lower() in ('.png', '.jpg', '.jpeg', '.webp'):
-                shutil.copy2(bg_file, backgrounds_dst / bg_file.name)
-                print(f"[INFO] Copied background: {bg_file.name}")
+        with os.scandir(backgrounds_src) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')):
+                    sources[f"backgrounds/{entry.name}"] = entry
+
+    # Copy character folder (skip Windows reserved names and legacy _backups)
+    char_prefix = f"images/characters/{char_name}/"
+    for rel_path, src_path in _walk_character_files(char_dir):
+        sources[char_prefix + rel_path] = src_path
+
+    # The copies are I/O bound and independent, so they run on a thread pool.
+    # A character not copied before goes over in one bulk copy alongside.
+    char_dest = images_dir / char_name
+    with ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 1) * 2)) as pool:
+        bulk_copy = None
+        if not char_dest.exists():
+            bulk_copy = pool.submit(_fast_copytree, char_dir, char_dest)
+        new_manifest = _sync_files(game_dir, sources, old_manifest, pool,
+                                   char_prefix if bulk_copy else None)
+        if bulk_copy:
+            bulk_copy.result()
+            log_info(f"Copied character: {char_name}")
+    _write_atomic(manifest_path, json.dumps(new_manifest).encode('utf-8'))
+
+    # Templates already patched, as {file: manifest signature of the copy
+    # that was patched}. A template re-copied since then gets checked again.
+    patched_path = TEST_PROJECT_DIR / PATCHED_SENTINEL_NAME
+    patched = _load_manifest(patched_path)
 
     # Patch effects.rpy to add missing imports (math, random)
     # In full ST these are imported elsewhere, but our minimal project needs them
     effects_path = game_dir / "effects.rpy"
-    if effects_path.exists():
-        with open(effects_path, 'r', encoding='utf-8') as f:
-            effects_content = f.read()
-
+    effects_content = None
+    if patched.get("effects.rpy") != new_manifest.get("effects.rpy"):
+        try:
+            if not _head_contains(effects_path, b"import math"):
+                effects_content = effects_path.read_text(encoding='utf-8')
+        except FileNotFoundError:
+            pass
+    if effects_content is not None:
         # Add imports right after "init -100 python:"
         if "import math" not in effects_content:
             effects_content = effects_content.replace(
                 "init -100 python:\n",
                 "init -100 python:\n    import math\n    import random\n"
             )
-            with open(effects_path, 'w', encoding='utf-8') as f:
-                f.write(effects_content)
+            _write_atomic(effects_path, effects_content.encode('utf-8'))
             print("[INFO] Patched effects.rpy with missing imports")
 
     # Patch character.py to make yaml import optional
     # We don't use the yaml-dependent functions, just the constants
     character_path = game_dir / "character.py"
-    if character_path.exists():
-        with open(character_path, 'r', encoding='utf-8') as f:
-            character_content = f.read()
-
+    character_content = None
+    if patched.get("character.py") != new_manifest.get("character.py"):
+        try:
+            if not _head_contains(character_path, b"yaml = None"):
+                character_content = character_path.read_text(encoding='utf-8')
+        except FileNotFoundError:
+            pass
+    if character_content is not None:
         if "import yaml" in character_content and "yaml = None" not in character_content:
             # Replace direct yaml import with a try/except that sets yaml to None if unavailable
             character_content = character_content.replace(
                 "import yaml",
                 "try:\n    import yaml\nexcept ImportError:\n    yaml = None  # Not needed for tester"
             )
-            with open(character_path, 'w', encoding='utf-8') as f:
-                f.write(character_content)
+            _write_atomic(character_path, character_content.encode('utf-8'))
             print("[INFO] Patched character.py to make yaml optional")
 
-    # Copy character folder (skip Windows reserved names and legacy _backups)
-    SKIP_NAMES = {"con", "prn", "aux", "nul", "_backups",
-                  *(f"com{i}" for i in range(1, 10)),
-                  *(f"lpt{i}" for i in range(1, 10))}
-
-    def _ignore_reserved(directory, contents):
-        """Skip files/dirs with Windows reserved device names or legacy _backups."""
-        return {name for name in contents
-                if name.lower() in SKIP_NAMES
-                or Path(name).stem.lower() in SKIP_NAMES}
-
-    char_dest = images_dir / char_name
-    shutil.copytree(char_dir, char_dest, ignore=_ignore_reserved)
-    log_info(f"Copied character: {char_name}")
+    now_patched = {name: new_manifest[name] for name in ("effects.rpy", "character.py")
+                   if name in new_manifest}
+    if now_patched != patched:
+        _write_atomic(patched_path, json.dumps(now_patched).encode('utf-8'))
 
     # Generate test script
     script_content = generate_test_script(char_name, char_data, char_dir)
     script_path = game_dir / "script.rpy"
-    with open(script_path, 'w', encoding='utf-8') as f:
-        f.write(script_content)
+    script_path.write_bytes(script_content.encode('utf-8'))
     print(f"[INFO] Generated test script: script.rpy")
 
     # Create minimal project.json (optional but nice to have)
     project_json = TEST_PROJECT_DIR / "project.json"
-    with open(project_json, 'w', encoding='utf-8') as f:
-        f.write('{"name": "Sprite Tester"}')
+    project_json.write_bytes(b'{"name": "Sprite Tester"}')
 
     return TEST_PROJECT_DIR
 
@@ -766,15 +812,16 @@ def _get_or_create_tk_root():
     return root, True
 
 
-def launch_sprite_tester(char_dir: Path) -> bool:
+def _prepare_sprite_test(char_dir: Path) -> tuple[Path, Path, Path] | None:
     """
-    Main entry point - launches the sprite tester for the given character.
+    Make sure the SDK is available, ask the user, and build the test project.
 
-    Called from pipeline.py after expression sheet generation.
-    Returns True if testing was performed, False if skipped.
+    Returns (renpy_exe, project_path, sdk_dir), or None if testing was
+    skipped or setup failed.
     """
     log_info(f"Sprite Tester: checking for Ren'Py SDK...")
-    log_info(f"SDK_DIR: {SDK_DIR}")
+    sdk_dir = get_sdk_dir()
+    log_info(f"SDK_DIR: {sdk_dir}")
     log_info(f"Frozen mode: {getattr(sys, 'frozen', False)}")
 
     # Check if Ren'Py SDK exists
@@ -789,7 +836,7 @@ def launch_sprite_tester(char_dir: Path) -> bool:
 
         result = messagebox.askyesno(
             "Ren'Py SDK Required",
-            f"Ren'Py SDK not found at:\n{SDK_DIR}\n\n"
+            f"Ren'Py SDK not found at:\n{sdk_dir}\n\n"
             f"Download Ren'Py {SDK_VERSION} SDK (~450MB)?\n\n"
             "This is required to test sprites in Ren'Py.\n"
             "You can also set RENPY_SDK_PATH environment variable\n"
@@ -801,7 +848,7 @@ def launch_sprite_tester(char_dir: Path) -> bool:
 
         if result:
             log_info("User accepted SDK download, starting...")
-            success = download_and_setup_sdk(SDK_DIR)
+            success = download_and_setup_sdk(sdk_dir)
             if success:
                 log_info("SDK download completed successfully")
                 renpy_exe = find_renpy_executable()
@@ -822,19 +869,19 @@ def launch_sprite_tester(char_dir: Path) -> bool:
                 )
                 if created:
                     root.destroy()
-                return False
+                return None
         else:
             log_info("SDK download declined by user, skipping sprite test")
-            return False
+            return None
 
     if not renpy_exe:
         log_error("Ren'Py SDK still not found after download attempt")
-        return False
+        return None
 
     # Check if templates exist
     if not TEMPLATES_DIR.exists():
         log_error(f"Templates not found at {TEMPLATES_DIR}, skipping sprite test")
-        return False
+        return None
 
     # Ask user if they want to test
     root, created = _get_or_create_tk_root()
@@ -854,7 +901,7 @@ def launch_sprite_tester(char_dir: Path) -> bool:
 
     if not result:
         log_info("Sprite test skipped by user")
-        return False
+        return None
 
     # Create the test project
     log_info("Setting up sprite test project...")
@@ -862,25 +909,113 @@ def launch_sprite_tester(char_dir: Path) -> bool:
 
     if not project_path:
         log_error("Failed to create test project")
-        return False
+        return None
 
-    # Launch Ren'Py
+    return renpy_exe, project_path, sdk_dir
+
+
+def _start_renpy(renpy_exe: Path, project_path: Path, sdk_dir: Path) -> subprocess.Popen | None:
+    """Start Ren'Py on the test project without waiting for it."""
     log_info(f"Launching Ren'Py: {renpy_exe}")
     log_info(f"Project: {project_path}")
 
     try:
-        # Run Ren'Py and wait for it to close
-        result = subprocess.run(
-            [str(renpy_exe), str(project_path)],
-            cwd=str(SDK_DIR),
-            check=False
-        )
-        log_info(f"Ren'Py exited with code: {result.returncode}")
-        return True
+        return subprocess.Popen([str(renpy_exe), str(project_path)], cwd=str(sdk_dir))
     except Exception as e:
         log_error(f"Failed to launch Ren'Py: {e}")
+        return None
+
+
+def launch_sprite_tester(char_dir: Path) -> bool:
+    """
+    Main entry point - launches the sprite tester for the given character.
+
+    Blocks until Ren'Py is closed; GUI callers should use
+    launch_sprite_tester_async instead.
+    Returns True if testing was performed, False if skipped.
+    """
+    prepared = _prepare_sprite_test(char_dir)
+    if not prepared:
+        return False
+
+    proc = _start_renpy(*prepared)
+    if not proc:
         return False
 
+    # Run Ren'Py and wait for it to close
+    returncode = proc.wait()
+    log_info(f"Ren'Py exited with code: {returncode}")
+    return True
+
+
+# How often launch_sprite_tester_async checks whether Ren'Py has exited
+RENPY_POLL_MS = 500
+
+# Ren'Py process started by launch_sprite_tester_async; cleared once it exits
+_tester_proc: subprocess.Popen | None = None
+
+
+def is_sprite_tester_running() -> bool:
+    """True while a test started by launch_sprite_tester_async is still open."""
+    return _tester_proc is not None and _tester_proc.poll() is None
+
+
+def launch_sprite_tester_async(
+    char_dir: Path,
+    on_exit: Callable[[int], None] | None = None,
+) -> subprocess.Popen | None:
+    """
+    Launch the sprite tester without blocking the Tk event loop.
+
+    Setup (SDK check, prompts, project creation) runs synchronously; Ren'Py
+    itself is started in the background and polled with Tk's after(), so the
+    calling window stays responsive while the test runs.
+
+    Args:
+        char_dir: Character folder to test
+        on_exit: Called on the Tk thread with Ren'Py's exit code
+
+    Only one test runs at a time: the test project is shared, and
+    re-syncing it while Ren'Py has its files open would fail on Windows.
+
+    Returns:
+        The Ren'Py process, or None if testing was skipped, failed to start,
+        or a test is already running (see is_sprite_tester_running).
+    """
+    global _tester_proc
+    if is_sprite_tester_running():
+        log_warning("Sprite tester is already running; close Ren'Py before starting another test")
+        return None
+
+    prepared = _prepare_sprite_test(char_dir)
+    if not prepared:
+        return None
+
+    proc = _start_renpy(*prepared)
+    if not proc:
+        return None
+    _tester_proc = proc
+
+    root = tk._default_root
+    if root is None:
+        # No event loop to poll from; the caller owns the process
+        return proc
+
+    def poll():
+        returncode = proc.poll()
+        if returncode is None:
+            root.after(RENPY_POLL_MS, poll)
+            return
+        global _tester_proc
+        if _tester_proc is proc:
+            _tester_proc = None
+        log_info(f"Ren'Py exited with code: {returncode}")
+        if on_exit:
+            on_exit(returncode)
+
+    root.after(RENPY_POLL_MS, poll)
+    return proc
+
 
 # Allow running directly for testing
 if __name__ == "__main__":
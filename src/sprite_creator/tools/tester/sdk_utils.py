@@ -5,17 +5,19 @@ Provides functions to download and extract the Ren'Py SDK when not present.
 Extracted from src/renpy_scaffolder/sdk_downloader.py for self-containment.
 """
 
+import functools
 import os
 import platform
 import shutil
 import ssl
 import sys
 import tarfile
+import tempfile
 import zipfile
 from pathlib import Path
-from urllib.request import urlretrieve, urlopen
+from typing import BinaryIO
+from urllib.request import urlopen
 from urllib.error import URLError
-import urllib.request
 
 from ...logging_utils import log_info, log_error, log_warning, log_debug
 
@@ -23,6 +25,9 @@ from ...logging_utils import log_info, log_error, log_warning, log_debug
 SDK_VERSION = "8.5.0"
 SDK_FOLDER_NAME = f"renpy-{SDK_VERSION}-sdk"
 
+# Chunk size for streaming the SDK archive from the network
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
 # Platform-specific download URLs
 SDK_URLS = {
     "Windows": "https://www.renpy.org/dl/8.5.0/renpy-8.5.0-sdk.zip",
@@ -31,8 +36,9 @@ SDK_URLS = {
 }
 
 
+@functools.lru_cache(maxsize=1)
 def get_platform() -> str | None:
-    """Detect the current platform. Returns None if unsupported."""
+    """Detect the current platform (cached). Returns None if unsupported."""
     system = platform.system()
     if system in SDK_URLS:
         return system
@@ -46,14 +52,20 @@ def show_progress(block_num: int, block_size: int, total_size: int) -> None:
     downloaded = block_num * block_size
     if total_size > 0:
         percent = min(downloaded * 100 / total_size, 100)
+        # Blocks are reported in order, so the previous call was for block_num - 1
+        prev_percent = min(max(block_num - 1, 0) * block_size * 100 / total_size, 100)
 
         size_mb = total_size / (1024 * 1024)
         downloaded_mb = downloaded / (1024 * 1024)
 
-        # Log progress at 10% intervals
-        if block_num == 0 or int(percent) % 10 == 0:
+        # Log progress once per 5% step
+        if block_num == 0 or int(percent) // 5 != int(prev_percent) // 5:
             log_debug(f"Download progress: {percent:.0f}% ({downloaded_mb:.1f}/{size_mb:.1f} MB)")
 
+        # Redraw the bar only when the whole percent changes
+        if block_num != 0 and int(percent) == int(prev_percent):
+            return
+
         # Also try to write to stdout for console apps
         try:
             bar_length = 50
@@ -66,12 +78,13 @@ def show_progress(block_num: int, block_size: int, total_size: int) -> None:
             pass
 
 
+@functools.lru_cache(maxsize=1)
 def _get_ssl_context():
     """
     Get an SSL context that works in frozen PyInstaller apps.
 
     PyInstaller bundles may not have SSL certificates accessible,
-    so we try multiple approaches.
+    so we try multiple approaches. The result is cached for the session.
     """
     # Try 1: Use bundled certifi in frozen app
     if getattr(sys, 'frozen', False):
@@ -115,34 +128,73 @@ def _get_ssl_context():
     return context
 
 
-def download_sdk(url: str, output_path: Path) -> bool:
+class _ProgressReader:
+    """Read-only file wrapper around an HTTP response that reports download progress."""
+
+    def __init__(self, resp, total_size: int):
+        self._resp = resp
+        self._total_size = total_size
+        self._block_num = 0
+        self.downloaded = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._resp.read(size)
+        self.downloaded += len(data)
+        # Report once per DOWNLOAD_CHUNK_SIZE, not on every small read from the extractor
+        block_num = self.downloaded // DOWNLOAD_CHUNK_SIZE
+        if block_num != self._block_num:
+            self._block_num = block_num
+            show_progress(block_num, DOWNLOAD_CHUNK_SIZE, self._total_size)
+        return data
+
+
+def download_and_extract_sdk(url: str, extract_to: Path, is_zip: bool) -> bool:
     """
-    Download the SDK from the given URL.
+    Download the SDK and extract it while the bytes arrive.
+
+    TAR.BZ2 archives are decompressed straight from the HTTP response. ZIP
+    archives need random access to their central directory, so they are
+    buffered in a temporary file first. (A real file rather than a
+    SpooledTemporaryFile: before Python 3.11 the latter has no seekable(),
+    which zipfile needs.)
 
     Args:
         url: The download URL
-        output_path: Where to save the downloaded file
+        extract_to: Directory to extract into (the SDK folder goes inside)
+        is_zip: True for .zip archives, False for .tar.bz2
 
     Returns:
         True if successful, False otherwise
     """
     log_info(f"Downloading Ren'Py SDK {SDK_VERSION}...")
     log_info(f"URL: {url}")
-    log_info(f"Destination: {output_path}")
+    log_info(f"Destination: {extract_to}")
 
     try:
         # Set up SSL context that works in frozen apps
         ssl_context = _get_ssl_context()
 
-        # Install custom SSL handler globally for urlretrieve
-        https_handler = urllib.request.HTTPSHandler(context=ssl_context)
-        opener = urllib.request.build_opener(https_handler)
-        urllib.request.install_opener(opener)
-
         log_info("Starting download (this may take several minutes)...")
-        urlretrieve(str(url), str(output_path), reporthook=show_progress)
-        log_info("Download complete!")
-        return True
+        with urlopen(str(url), context=ssl_context) as resp:
+            total_size = int(resp.headers.get("Content-Length") or 0)
+            if total_size:
+                size_mb = total_size / (1024 * 1024)
+                log_info(f"Download size: {size_mb:.1f} MB")
+                if size_mb < 10:
+                    log_error(f"Download seems too small ({size_mb:.1f} MB), may be corrupted")
+                    return False
+
+            reader = _ProgressReader(resp, total_size)
+            if is_zip:
+                with tempfile.TemporaryFile() as buffer:
+                    shutil.copyfileobj(reader, buffer, DOWNLOAD_CHUNK_SIZE)
+                    log_info("Download complete!")
+                    buffer.seek(0)
+                    return extract_zip(buffer, extract_to)
+            success = extract_tar(reader, extract_to)
+            if success:
+                log_info("Download complete!")
+            return success
     except URLError as e:
         log_error(f"Download failed (URL error): {e}", exc_info=True)
         if "SSL" in str(e) or "CERTIFICATE" in str(e).upper():
@@ -154,28 +206,13 @@ def download_sdk(url: str, output_path: Path) -> bool:
         return False
 
 
-def extract_zip(zip_path: Path, extract_to: Path) -> bool:
-    """Extract a ZIP file with progress."""
+def extract_zip(zip_file: Path | BinaryIO, extract_to: Path) -> bool:
+    """Extract a ZIP file (path or seekable file object)."""
     log_info("Extracting ZIP archive...")
     try:
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            members = zip_ref.namelist()
-            total = len(members)
-            log_info(f"Extracting {total} files...")
-
-            for i, member in enumerate(members):
-                zip_ref.extract(member, extract_to)
-                percent = (i + 1) * 100 / total
-
-                # Log at 10% intervals
-                if (i + 1) % max(1, total // 10) == 0:
-                    log_debug(f"Extraction progress: {percent:.0f}%")
-
-                try:
-                    sys.stdout.write(f'\rExtracting: {percent:.1f}% ({i + 1}/{total} files)')
-                    sys.stdout.flush()
-                except Exception:
-                    pass
+        with zipfile.ZipFile(zip_file, 'r') as zip_ref:
+            log_info(f"Extracting {len(zip_ref.infolist())} files...")
+            zip_ref.extractall(extract_to)
 
         log_info("Extraction complete!")
         return True
@@ -184,30 +221,18 @@ def extract_zip(zip_path: Path, extract_to: Path) -> bool:
         return False
 
 
-def extract_tar(tar_path: Path, extract_to: Path) -> bool:
-    """Extract a TAR.BZ2 file with progress."""
+def extract_tar(tar_stream: BinaryIO, extract_to: Path) -> bool:
+    """Extract a TAR.BZ2 stream as it is read."""
     log_info("Extracting TAR.BZ2 archive...")
     try:
-        with tarfile.open(tar_path, 'r:bz2') as tar_ref:
-            members = tar_ref.getmembers()
-            total = len(members)
-            log_info(f"Extracting {total} files...")
-
-            for i, member in enumerate(members):
-                tar_ref.extract(member, extract_to)
-                percent = (i + 1) * 100 / total
-
-                # Log at 10% intervals
-                if (i + 1) % max(1, total // 10) == 0:
-                    log_debug(f"Extraction progress: {percent:.0f}%")
-
-                try:
-                    sys.stdout.write(f'\rExtracting: {percent:.1f}% ({i + 1}/{total} files)')
-                    sys.stdout.flush()
-                except Exception:
-                    pass
-
-        log_info("Extraction complete!")
+        # Streaming mode: members are extracted in archive order without seeking,
+        # so the total member count is only known afterwards
+        # Read the response in DOWNLOAD_CHUNK_SIZE blocks rather than tarfile's 10 KiB default
+        with tarfile.open(fileobj=tar_stream, mode='r|bz2', bufsize=DOWNLOAD_CHUNK_SIZE) as tar_ref:
+            tar_ref.extractall(extract_to)
+            count = len(tar_ref.getmembers())
+
+        log_info(f"Extraction complete! ({count} files)")
         return True
     except Exception as e:
         log_error(f"Extraction failed: {e}", exc_info=True)
@@ -260,17 +285,14 @@ def download_and_setup_sdk(install_dir: Path) -> bool:
 
     log_info(f"Detected platform: {platform_name}")
 
-    # Get download URL and file extension
+    # Get download URL and archive type
     download_url = SDK_URLS[platform_name]
-    file_extension = ".zip" if platform_name == "Windows" else ".tar.bz2"
-    download_filename = f"renpy-{SDK_VERSION}-sdk{file_extension}"
+    is_zip = platform_name == "Windows"
 
     # The parent directory where we'll extract (SDK folder goes inside)
     parent_dir = install_dir.parent
-    download_path = parent_dir / download_filename
 
     log_info(f"Parent directory: {parent_dir}")
-    log_info(f"Download path: {download_path}")
 
     # Ensure parent directory exists
     try:
@@ -285,32 +307,11 @@ def download_and_setup_sdk(install_dir: Path) -> bool:
         log_info(f"SDK already exists at {install_dir}")
         return True
 
-    # Download
-    if not download_sdk(download_url, download_path):
-        log_error("SDK download failed")
-        return False
-
-    # Verify download file exists and has reasonable size
-    if not download_path.exists():
-        log_error(f"Download file not found: {download_path}")
-        return False
-
-    file_size_mb = download_path.stat().st_size / (1024 * 1024)
-    log_info(f"Downloaded file size: {file_size_mb:.1f} MB")
-
-    if file_size_mb < 10:
-        log_error(f"Downloaded file seems too small ({file_size_mb:.1f} MB), may be corrupted")
-        return False
-
-    # Extract
-    log_info(f"Extracting to: {parent_dir}")
-    if file_extension == ".zip":
-        success = extract_zip(download_path, parent_dir)
-    else:
-        success = extract_tar(download_path, parent_dir)
-
-    if not success:
-        log_error("SDK extraction failed")
+    # Download and extract in a single pass (no intermediate archive on disk)
+    if not download_and_extract_sdk(download_url, parent_dir, is_zip):
+        log_error("SDK download/extraction failed")
+        # Don't leave a partial SDK behind for the next launch to find
+        shutil.rmtree(install_dir, ignore_errors=True)
         return False
 
     # Verify
@@ -318,13 +319,5 @@ def download_and_setup_sdk(install_dir: Path) -> bool:
         log_warning("SDK verification failed, but extraction completed - will try anyway")
         # Continue anyway - might still work
 
-    # Cleanup downloaded archive
-    log_info("Cleaning up downloaded archive...")
-    try:
-        download_path.unlink()
-        log_info(f"Deleted: {download_filename}")
-    except Exception as e:
-        log_warning(f"Could not delete archive: {e}")
-
     log_info("Ren'Py SDK setup complete!")
     return True
@@ -1,33 +1,66 @@
 import os
 from collections import defaultdict
+from functools import lru_cache
+from operator import itemgetter
 
 from renpy.display.im import Image
 from renpy.exports import error
 
 
-def qualify(map, outfit, accessories):
-    """Returns the map value that qualifies person"""
-    key = max(map, key=lambda k: k.match_score(outfit, accessories))
-    if key.match_score(outfit, accessories) < 0:
+def qualify(map, index, outfit, acc_mask):
+    """Returns the map value that qualifies person
+
+    Only the qualifiers indexed under the outfit and the outfit-agnostic ones
+    are scored, since any other qualifier cannot match.
+    """
+    if len(map) == 1:
+        # Most names only have the default qualifier
+        key, value = next(iter(map.items()))
+        return value if key.match_score(outfit, acc_mask) >= 0 else None
+
+    best, best_score = None, -1
+    for candidates in (index["by_outfit"].get(outfit, ()), index["any"]):
+        for key in candidates:
+            score = key.match_score(outfit, acc_mask)
+            if score > best_score:
+                best, best_score = key, score
+    if best is None:
         return None
-    return map[key]
+    return map[best]
 
 
-class BodyImageQualifier:
-    def __init__(self, body, qInfo=None):
-        self.outfits = set()
-        self.accessories = set()
+def new_qualifier_index():
+    return {"by_outfit": {}, "any": []}
+
 
-        if not qInfo:
-            return
+def index_qualifier(index, qualifier):
+    if qualifier._has_outfits:
+        for outfit in qualifier.outfits:
+            index["by_outfit"].setdefault(outfit, []).append(qualifier)
+    else:
+        index["any"].append(qualifier)
 
-        if "$" in qInfo:
-            self.outfits.add(qInfo["$"])
-        if "@" in qInfo:
-            for a in qInfo["@"]:
-                self.accessories.add(a)
-        if "%" in qInfo:
-            self.outfits.update(body.mutation_to_outfits[qInfo["%"]])
+
+class BodyImageQualifier:
+    def __init__(self, body, qInfo=None):
+        outfits = set()
+        accessories = set()
+
+        if qInfo:
+            if "$" in qInfo:
+                outfits.add(qInfo["$"])
+            if "@" in qInfo:
+                for a in qInfo["@"]:
+                    accessories.add(a)
+            if "%" in qInfo:
+                outfits.update(body.mutation_to_outfits[qInfo["%"]])
+
+        # Qualifiers are used as dict keys, so freeze them and hash once
+        self.outfits = frozenset(outfits)
+        self.accessories = frozenset(accessories)
+        self._hash = hash((self.outfits, self.accessories))
+        self._has_outfits = bool(self.outfits)
+        self.acc_mask = body.accessories_mask(self.accessories, register=True)
 
     def __repr__(self):
         return "BodyImageQualifier(outfits={}, accessories={})".format(
@@ -35,25 +68,26 @@ class BodyImageQualifier:
         )
 
     def __hash__(self):
-        return hash((tuple(self.outfits), tuple(self.accessories)))
+        return self._hash
 
     def __eq__(self, other):
         return self.outfits == other.outfits and self.accessories == other.accessories
 
-    def match_score(self, outfit, accessories):
+    def match_score(self, outfit, acc_mask):
         # Outfit score
-        if self.outfits:
+        if self._has_outfits:
             if outfit not in self.outfits:
                 return -1
             score = 100
         else:
             score = 0
 
-        # Accessories score
-        if self.accessories:
-            if not self.accessories.issubset(accessories):
+        # Accessories score (acc_mask is the person's accessories as a bitmask)
+        if self.acc_mask:
+            matched = self.acc_mask & acc_mask
+            if matched != self.acc_mask:
                 return -1
-            score += len(self.accessories.intersection(accessories))
+            score += matched.bit_count()
 
         return score
 
@@ -65,11 +99,37 @@ class Pose:
         self.center = center
         self.direction = direction
 
-        # Graphics
+        # Graphics (autovivifying while the body is built, see finalize)
         self.outfits = {}
         self.faces = defaultdict(lambda: defaultdict(dict))
         self.accessories = defaultdict(lambda: defaultdict(dict))
 
+        # Qualifiers of each face/accessory name, bucketed by outfit
+        self.face_index = {}
+        self.accessory_index = {}
+        # Group of each accessory name ("hat_red" -> "hat"), or None
+        self._acc_group = {}
+
+        # Qualifier lookups, keyed by (outfit, accessories mask)
+        self._face_cache = {}
+        self._acc_cache = {}
+
+    def clear_caches(self):
+        self._face_cache.clear()
+        self._acc_cache.clear()
+
+    def finalize(self):
+        """Converts the graphics maps to plain dicts, dropping empty entries"""
+        self.faces = {
+            name: dict(qualifiers) for name, qualifiers in self.faces.items() if qualifiers
+        }
+        self.accessories = {
+            name: dict(qualifiers)
+            for name, qualifiers in self.accessories.items()
+            if qualifiers
+        }
+        self.clear_caches()
+
     def init_size(self, w_half, h):
         self.pos = (w_half - self.center[0], h - self.size[1])
         self.ycenter = (self.center[1] + self.pos[1]) / float(h)
@@ -82,11 +142,19 @@ class Pose:
             return None
         return None
 
-    def select_face_img(self, name, blushing, outfit, accessories):
+    def select_face_img(self, name, blushing, outfit, acc_mask):
+        key = (name, outfit, acc_mask, blushing)
+        if key in self._face_cache:
+            return self._face_cache[key]
+        img = self._select_face_img(name, blushing, outfit, acc_mask)
+        self._face_cache[key] = img
+        return img
+
+    def _select_face_img(self, name, blushing, outfit, acc_mask):
         # Get the face image that qualifies
         if name not in self.faces:
             return None
-        face = qualify(self.faces[name], outfit, accessories)
+        face = qualify(self.faces[name], self.face_index[name], outfit, acc_mask)
         if not face:
             return None
 
@@ -97,7 +165,17 @@ class Pose:
             return face[not blushing]
         return None
 
-    def select_accessory_imgs(self, outfit, accessories):
+    def select_accessory_imgs(self, outfit, accessories, acc_mask):
+        # Every accessory name of the body has a bit, so the mask fully
+        # determines the result
+        key = (outfit, acc_mask)
+        if key not in self._acc_cache:
+            self._acc_cache[key] = self._select_accessory_imgs(
+                outfit, accessories, acc_mask
+            )
+        return self._acc_cache[key]
+
+    def _select_accessory_imgs(self, outfit, accessories, acc_mask):
         tmp = []
         active_groups = set()
         # Generate a list of (name, accessory) tuples for all accessories that are active
@@ -106,15 +184,19 @@ class Pose:
             if not qualify_map:
                 continue
             # Grab the qualified accessory
-            accessory = qualify(qualify_map, outfit, accessories)
+            accessory = qualify(
+                qualify_map, self.accessory_index[accessory_name], outfit, acc_mask
+            )
             if not accessory:
                 continue
 
             # Get the correct on/off image
             is_on = accessory_name in accessories
 
-            if is_on and "_" in accessory_name:
-                active_groups.add(accessory_name.split("_")[0])
+            if is_on:
+                group = self._acc_group.get(accessory_name)
+                if group is not None:
+                    active_groups.add(group)
 
             if is_on in accessory:
                 tmp.append((accessory_name, accessory[is_on][0], accessory[is_on][1]))
@@ -136,6 +218,16 @@ class Expression:
         self.name = name
 
 
+@lru_cache(maxsize=512)
+def _emotion_to_expression(emotion):
+    # pose-expression style
+    if emotion.count("_") > 2:
+        error("Invalid emotion: {0}".format(emotion))
+    emotion_data = emotion.split("_")
+    pose_name, name = "_".join(emotion_data[:-1]), emotion_data[-1]
+    return Expression(pose_name, name)
+
+
 # This class holds information about bodies
 class Body:
     def __init__(self, color, scale, voice, default_outfit, eye_line, mutations={}):
@@ -146,6 +238,9 @@ class Body:
         self.eye_line = eye_line
         self.all_outfits = set()
         self._all_accessories = set()
+        self._groups_cache = None
+        self._all_acc_cache = None
+        self._accessory_bits = {}
         self.all_expressions = set()
         self.poses = {}
         self.size = 0
@@ -155,8 +250,32 @@ class Body:
         for mutation_name, outfit_names in mutations.items():
             self.mutation_to_outfits[mutation_name] = frozenset(outfit_names)
 
+    def accessories_mask(self, accessories, register=False):
+        """Returns the accessories as a bitmask, one bit per accessory name"""
+        bits = self._accessory_bits
+        mask = 0
+        for acc in accessories:
+            bit = bits.get(acc)
+            if bit is None:
+                if not register:
+                    # Unknown to this body, so no image can depend on it
+                    continue
+                bit = bits[acc] = 1 << len(bits)
+            mask |= bit
+        return mask
+
+    def finalize(self):
+        """Called once all outfits, faces and accessories have been added.
+        Further add_* calls still work."""
+        for pose in self.poses.values():
+            pose.finalize()
+
     def set_size(self, width, height):
+        """Sets the body size and positions every added pose within it.
+        Layout is computed here once; rendering only reads pose.pos."""
         self.size = (width, height)
+        for pose in self.poses.values():
+            pose.init_size(width // 2, height)
 
     def add_pose(self, pose):
         self.poses[pose.name] = pose
@@ -164,45 +283,70 @@ class Body:
     def add_outfit(self, pose_name, name, filename):
         filename = filename.replace(os.sep, "/")
         self.all_outfits.add(name)
-        self.poses[pose_name].outfits[name] = Image(filename)
+        pose = self.poses[pose_name]
+        pose.outfits[name] = Image(filename)
+        pose.clear_caches()
 
     def add_face(self, pose_name, name, qualifier, blush, filename):
         filename = filename.replace(os.sep, "/")
         self.all_expressions.add(pose_name + "_" + name)
         self._all_accessories.update(qualifier.accessories)
+        self._groups_cache = self._all_acc_cache = None
         self.all_outfits.update(qualifier.outfits)
-        self.poses[pose_name].faces[name][qualifier][blush] = Image(filename)
+        pose = self.poses[pose_name]
+        qualifiers = pose.faces.setdefault(name, {})
+        if qualifier not in qualifiers:
+            qualifiers[qualifier] = {}
+            index_qualifier(
+                pose.face_index.setdefault(name, new_qualifier_index()), qualifier
+            )
+        qualifiers[qualifier][blush] = Image(filename)
+        pose.clear_caches()
 
     def add_accessory(self, pose_name, name, qualifier, is_on, filename, zorder=0):
         filename = filename.replace(os.sep, "/")
         self._all_accessories.add(name)
+        self.accessories_mask((name,), register=True)
         self._all_accessories.update(qualifier.accessories)
+        self._groups_cache = self._all_acc_cache = None
         self.all_outfits.update(qualifier.outfits)
-        self.poses[pose_name].accessories[name][qualifier][is_on] = (
+        pose = self.poses[pose_name]
+        pose._acc_group[name] = name.split("_", 1)[0] if "_" in name else None
+        qualifiers = pose.accessories.setdefault(name, {})
+        if qualifier not in qualifiers:
+            qualifiers[qualifier] = {}
+            index_qualifier(
+                pose.accessory_index.setdefault(name, new_qualifier_index()), qualifier
+            )
+        qualifiers[qualifier][is_on] = (
             Image(filename),
             zorder,
         )
+        pose.clear_caches()
 
+    # Both are cached until the next add_face/add_accessory; callers must not
+    # mutate the returned collections
     @property
     def accessory_groups(self):
-        groups = set()
-        for acc in self._all_accessories:
-            if "_" in acc:
-                groups.add(acc.split("_")[0])
-        return groups
+        if self._groups_cache is None:
+            groups = set()
+            for acc in self._all_accessories:
+                if "_" in acc:
+                    groups.add(acc.split("_")[0])
+            self._groups_cache = groups
+        return self._groups_cache
 
     @property
     def all_accessories(self):
-        groups = self.accessory_groups
-        return [acc for acc in self._all_accessories if acc not in groups]
+        if self._all_acc_cache is None:
+            groups = self.accessory_groups
+            self._all_acc_cache = [
+                acc for acc in self._all_accessories if acc not in groups
+            ]
+        return self._all_acc_cache
 
     def emotion_to_expression(self, emotion):
-        # pose-expression style
-        if emotion.count("_") > 2:
-            error("Invalid emotion: {0}".format(emotion))
-        emotion_data = emotion.split("_")
-        pose_name, name = "_".join(emotion_data[:-1]), emotion_data[-1]
-        return Expression(pose_name, name)
+        return _emotion_to_expression(emotion)
 
     def get_pose(self, emotion):
         expression = self.emotion_to_expression(emotion)
@@ -213,20 +357,20 @@ class Body:
         if expression.pose_name not in self.poses:
             return None, None
         pose = self.poses[expression.pose_name]
+        acc_mask = self.accessories_mask(person.accessories)
 
-        accessories = sorted(
-            [
-                (image, zorder)
-                for image, zorder in pose.select_accessory_imgs(
-                    person.outfit, person.accessories
-                ).values()
-            ],
-            key=lambda x: x[1],
-        )
-
-        images = []
+        # Split accessories into those behind (zorder < 0) and in front of
+        # the body, each sorted by zorder
+        behind = []
+        in_front = []
+        for image, zorder in pose.select_accessory_imgs(
+            person.outfit, person.accessories, acc_mask
+        ).values():
+            (behind if zorder < 0 else in_front).append((image, zorder))
+        behind.sort(key=itemgetter(1))
+        in_front.sort(key=itemgetter(1))
 
-        images.extend([k for k, v in accessories if v < 0])
+        images = [k for k, v in behind]
 
         # Outfit/nude base
         img = pose.select_outfit_img(person.outfit)
@@ -241,7 +385,7 @@ class Body:
 
         # Face
         img = pose.select_face_img(
-            expression.name, blushing, person.outfit, person.accessories
+            expression.name, blushing, person.outfit, acc_mask
         )
         if img:
             images.append(img)
@@ -253,6 +397,6 @@ class Body:
             )
 
         # Accessories
-        images.extend([k for k, v in accessories if v >= 0])
+        images.extend([k for k, v in in_front])
 
         return pose, images
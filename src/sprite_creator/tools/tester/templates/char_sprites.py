@@ -1,5 +1,7 @@
+from collections import OrderedDict
 from math import atan2, cos, pi, sin
 from random import uniform
+from weakref import WeakValueDictionary
 
 import renpy.exports as renpy
 from character import FacingLeft, voice_tomboy
@@ -14,22 +16,31 @@ from renpy.python import RevertableDict, RevertableObject, RevertableSet
 #####################
 
 
+def _bodies():
+    return renpy.store.bodies
+
+
 def get_sprite_path(root):
     """Returns the path from a CharacterSprite displayable to the root node.
     The returned value is a list with the CharacterSprite as the first element
     and the root as the last, or None if the CharacterSprite was not found.
     """
-    if isinstance(root, CharacterSprite):
-        return [root]
-    for child in root.visit():
-        if not child:
+    # Iterative depth-first search; each stack entry carries its ancestors
+    # as a linked (parent, grandparent_link) chain
+    stack = [(root, None)]
+    while stack:
+        node, ancestors = stack.pop()
+        if not node:
             continue
-        path = get_sprite_path(child)
-        if path is not None:
-            path.append(root)
+        if isinstance(node, CharacterSprite):
+            path = [node]
+            while ancestors is not None:
+                parent, ancestors = ancestors
+                path.append(parent)
             return path
-    else:
-        return None
+        link = (node, ancestors)
+        stack.extend((child, link) for child in reversed(node.visit()))
+    return None
 
 
 def sprite_of(what, layer="master"):
@@ -42,18 +53,15 @@ def sprite_of(what, layer="master"):
     else:
         renpy.error("Do not know how to get sprite of a %s" % what.__class__.__name__)
 
-    def func(node):
+    stack = [d]
+    while stack:
+        node = stack.pop()
         if not node:
-            return None
+            continue
         if isinstance(node, CharacterSprite):
             return node
-        for child in node.visit():
-            child_d = func(child)
-            if child_d:
-                return child_d
-        return None
-
-    return func(d)
+        stack.extend(reversed(node.visit()))
+    return None
 
 
 """
@@ -96,6 +104,11 @@ class Speaker(VoicedCharacter):
         VoicedCharacter.__init__(self, name, **kvargs)
 
 
+# (zoom, xzoom) of each shown person by image tag, cleared every interaction.
+# Kept outside Person so it is never saved or rolled back.
+zoom_cache = {}
+
+
 class Person(RevertableObject, VoicedCharacter):
     """A character with a body.
     The body can be changed as the game progresses.
@@ -109,8 +122,9 @@ class Person(RevertableObject, VoicedCharacter):
         self.body = body
         self.name = name
 
-        if body in getattr(renpy.store, "bodies"):
-            self.outfit = getattr(renpy.store, "bodies")[body].default_outfit
+        bodies = _bodies()
+        if body in bodies:
+            self.outfit = bodies[body].default_outfit
         else:
             self.outfit = ""
 
@@ -118,7 +132,7 @@ class Person(RevertableObject, VoicedCharacter):
 
     @property
     def voice(self):
-        return getattr(renpy.store, "bodies")[self._body].voice
+        return _bodies()[self._body].voice
 
     @property
     def body(self):
@@ -127,7 +141,7 @@ class Person(RevertableObject, VoicedCharacter):
     @body.setter
     def body(self, value):
         self._body = value
-        bodyObj = getattr(renpy.store, "bodies").get(value)
+        bodyObj = _bodies().get(value)
         self.who_args["color"] = "#ffffff" if bodyObj is None else bodyObj.color
 
     @property
@@ -136,22 +150,17 @@ class Person(RevertableObject, VoicedCharacter):
 
     @property
     def zoom(self):
-        img = scene_lists().get_displayable_by_tag("master", self.image_tag)
-        path = get_sprite_path(img)
-        if path is None:
-            error(
-                'Did not find body graphic for "%s" in its transform tree'
-                % self.image_tag
-            )
-            return 1.0
-        else:
-            zoom = 1.0
-            for d in path[1:]:
-                zoom *= getattr(d, "zoom", 1.0)
-            return zoom
+        return self._zooms()[0]
 
     @property
     def xzoom(self):
+        return self._zooms()[1]
+
+    def _zooms(self):
+        """Returns (zoom, xzoom) of the transform tree, cached per interaction"""
+        if self.image_tag in zoom_cache:
+            return zoom_cache[self.image_tag]
+
         img = scene_lists().get_displayable_by_tag("master", self.image_tag)
         path = get_sprite_path(img)
         if path is None:
@@ -159,16 +168,19 @@ class Person(RevertableObject, VoicedCharacter):
                 'Did not find body graphic for "%s" in its transform tree'
                 % self.image_tag
             )
-            return 1.0
-        else:
-            xzoom = 1.0
-            for d in path[1:]:
-                xzoom *= getattr(d, "xzoom", 1.0)
-            return xzoom
+            return 1.0, 1.0
+
+        zoom = 1.0
+        xzoom = 1.0
+        for d in path[1:]:
+            zoom *= getattr(d, "zoom", 1.0)
+            xzoom *= getattr(d, "xzoom", 1.0)
+        zoom_cache[self.image_tag] = (zoom, xzoom)
+        return zoom, xzoom
 
     def predict_outfit(self, outfit):
         result = []
-        for pose in getattr(renpy.store, "bodies")[self._body].poses.values():
+        for pose in _bodies()[self._body].poses.values():
             if outfit in pose.outfits:
                 result.append(pose.outfits[outfit])
         return result
@@ -182,21 +194,17 @@ class Person(RevertableObject, VoicedCharacter):
     def clone(self, other):
         # Copy physical attributes
         self.outfit = other.outfit
-        self.accessories = set(other.accessories)
+        if self.accessories != other.accessories:
+            self.accessories = RevertableSet(other.accessories)
         self.body = other.body
 
     def add_accessory(self, accessory):
         if "_" in accessory:
-            group = accessory.split("_")[0]
-            new_accs = set()
-            for item in self.accessories:
-                if item.startswith("{}_".format(group)):
-                    continue
-                new_accs.add(item)
-            new_accs.update(
-                set([x for x in self.accessories if not x.startswith(group)])
+            # Only one accessory of a group can be worn at a time
+            prefix = accessory.split("_", 1)[0] + "_"
+            self.accessories = RevertableSet(
+                a for a in self.accessories if not a.startswith(prefix)
             )
-            self.accessories = new_accs
         self.accessories.add(accessory)
 
     def remove_accessory(self, accessory):
@@ -207,7 +215,7 @@ class Person(RevertableObject, VoicedCharacter):
 
     def reset(self):
         self.accessories.clear()
-        bodies = getattr(renpy.store, "bodies")
+        bodies = _bodies()
         self.body = bodies[self.image_tag]
         self.outfit = bodies[self.image_tag].default_outfit
         self.name = getattr(renpy.store, "characters")[self.image_tag]
@@ -244,7 +252,8 @@ class Ghost(Person):
         host = getattr(store, self.host_name)
         if self.body == host.body:
             self.outfit = host.outfit
-            self.accessories = set(host.accessories)
+            if self.accessories != host.accessories:
+                self.accessories = RevertableSet(host.accessories)
 
     def animate(self, trans, st, at):
         dt = at - self.lastanim
@@ -308,6 +317,13 @@ class GhostFloat(RevertableObject):
 # This is a displayable used by renpy.image() to render characters with properties
 # tracked by Ren'Py rather than Person (i.e. emotion and blush, for now)
 class CharacterSprite(Displayable):
+    # Composed images shared by all sprites, keyed by everything compose() reads
+    _compose_cache = OrderedDict()
+    _compose_cache_size = 64
+    # Composed images by their structure, so sprites (or states) resolving to
+    # the same images share one displayable as long as anything uses it
+    _composite_cache = WeakValueDictionary()
+
     def __init__(self, person_name, emotion, blushing, **kwargs):
         Displayable.__init__(self, **kwargs)
 
@@ -378,7 +394,9 @@ class CharacterSprite(Displayable):
         return render
 
     def compose(self):
-        person, body, pose, images = self._get_objects_and_images(True)
+        # Only the person and body are needed to pick the outfit; images are
+        # resolved once the outfit is final
+        person, body = self._get_objects()
         if person is None:
             return 0, 0, None
 
@@ -397,31 +415,61 @@ class CharacterSprite(Displayable):
             )
         except:
             person.outfit = outfit_original
-        # Refresh the data, since we may have changed outfit
-        person, body, pose, images = self._get_objects_and_images(True)
         ### END ###
 
-        width, height = body.size[0] * body.scale, body.size[1] * body.scale
-
-        # Compose the images
-        composite_args = []
-        for img in images:
-            composite_args.append(pose.pos)
-            composite_args.append(img)
-        img = Composite(body.size, *composite_args)
-
-        if pose.direction is FacingLeft:
-            img = Flip(img, horizontal=True)
-        img = Scale(img, width, height)
-
         # If screen is blurred (and we're not the protag), blur this image
         blur = store.screenfilter.blur
         if (
-            blur > 0.0
-            and self.person_name != store.protagonist
-            and self.person_name not in renpy.store.phone_images
+            blur <= 0.0
+            or self.person_name == store.protagonist
+            or self.person_name in renpy.store.phone_images
         ):
-            img = renpy.display.im.Blur(img, store.screenfilter.blur / float(12))
+            blur = 0.0
+
+        key = (
+            type(self),
+            self.person_name,
+            person.body,
+            person.outfit,
+            frozenset(person.accessories),
+            self.emotion,
+            self.blushing,
+            blur,
+            store.screenfilter.colorblind,
+        )
+        cache = CharacterSprite._compose_cache
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+
+        person, body, pose, images = self._get_objects_and_images(True)
+        if person is None:
+            return 0, 0, None
+
+        width, height = body.size[0] * body.scale, body.size[1] * body.scale
+
+        # Image manipulators hash and compare by their identity, so the
+        # images themselves can be part of the key
+        flipped = pose.direction is FacingLeft
+        structure = (body.size, pose.pos, flipped, width, height, blur, tuple(images))
+        img = CharacterSprite._composite_cache.get(structure)
+        if img is None:
+            # Compose the images, as alternating (pos, image) arguments
+            composite_args = [pose.pos] * (2 * len(images))
+            composite_args[1::2] = images
+            img = Composite(body.size, *composite_args)
+
+            if flipped:
+                img = Flip(img, horizontal=True)
+            img = Scale(img, width, height)
+
+            if blur > 0.0:
+                img = renpy.display.im.Blur(img, blur / float(12))
+            CharacterSprite._composite_cache[structure] = img
+
+        cache[key] = (width, height, img)
+        if len(cache) > CharacterSprite._compose_cache_size:
+            cache.popitem(last=False)
 
         # Return result
         return width, height, img
@@ -433,6 +481,7 @@ class CharacterSprite(Displayable):
         return images
 
     def per_interact(self):
+        zoom_cache.clear()
         renpy.display.render.redraw(self, 0)
 
     @property
@@ -458,7 +507,7 @@ class CharacterSprite(Displayable):
         person = getattr(store, self.person_name)
         if not isinstance(person, Person):
             return None, None
-        body = getattr(renpy.store, "bodies")[person.body.replace("Ghost", "")]
+        body = _bodies()[person.body.replace("Ghost", "")]
         return person, body
 
     def _get_objects_and_images(self, fatal):
@@ -470,7 +519,9 @@ class CharacterSprite(Displayable):
         )
         if not pose:
             return None, None, None, None
-        images = [store.screenfilter.tint(img) for img in images]
+        screenfilter = store.screenfilter
+        if screenfilter.tint_active:
+            images = [screenfilter.tint(img) for img in images]
         return person, body, pose, images
 
     nosave = ["img"]
@@ -543,6 +594,7 @@ def define_sprite(name, image):
 
 
 def make_sprites_dirty():
+    CharacterSprite._compose_cache.clear()
     for sprite in sprites.values():
         if isinstance(sprite, Transform):
             sprite = sprite.child
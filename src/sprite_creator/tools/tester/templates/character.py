@@ -146,12 +146,11 @@ def add_local_character(char_tree_map, char_name, path_prefix, prefix=""):
         if pose.size[1] > max_h:
             max_h = pose.size[1]
 
-    body.set_size(max_w_half * 2, max_h)
-
     for pose in poses:
-        pose.init_size(max_w_half, max_h)
         body.add_pose(pose)
 
+    body.set_size(max_w_half * 2, max_h)
+
     for pose_item in list_dirs(char_tree_map):
         #############
         # Outfits   #
@@ -446,6 +445,8 @@ def add_local_character(char_tree_map, char_name, path_prefix, prefix=""):
                     mutation_item,
                 )
 
+    body.finalize()
+
     for pose in poses:
         for outfit in pose.outfits.keys():
             all_outfits.add(outfit)
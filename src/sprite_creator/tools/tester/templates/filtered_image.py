@@ -1,4 +1,6 @@
 import re
+import weakref
+from functools import lru_cache
 
 import renpy.display.im as im
 import renpy.exports as renpy
@@ -8,92 +10,151 @@ from renpy.exports import Displayable, store
 from renpy.python import RevertableObject
 
 
+# Compiled sanitize_filename_spaced patterns, by prefix
+_sanitize_patterns = {}
+
+
 def sanitize_filename_spaced(filename, prefix):
-    return re.sub(rf"(^{re.escape(prefix)}/|\..+$)", "", filename).replace("/", " ")
+    pattern = _sanitize_patterns.get(prefix)
+    if pattern is None:
+        pattern = _sanitize_patterns[prefix] = re.compile(rf"(^{re.escape(prefix)}/|\..+$)")
+    return pattern.sub("", filename).replace("/", " ")
+
+
+@lru_cache(maxsize=2048)
+def _image_dimensions(path):
+    """(width, height) of an image file, read from its header once per path."""
+    return get_image_size(renpy.exports.file(path)).get_dimensions()
+
+
+# Marker drawn at the center of each image while the coordinate grid is shown
+GRID_DOT_SIZE = (15, 15)
+
+
+@lru_cache(maxsize=1)
+def _grid_dot():
+    return Transform(renpy.display.imagelike.Solid("#1E90FF"), maxsize=GRID_DOT_SIZE)
 
 
 class FilteredImage(Displayable):
+    # Filter state the current filtered displayable was built for (see
+    # _filter_state). Class-level defaults so older saves still load.
+    _filter_key = None
+    _filtered = None
+
     def __init__(self, child, **kwargs):
         super().__init__(**kwargs)
-        if isinstance(child, str):
-            self.name = sanitize_filename_spaced(child, "images")
-            file = renpy.exports.file(child.replace("\\", "/"))
-        else:
-            self.name = sanitize_filename_spaced(child.image.filename, "images")
-            file = renpy.exports.file(child.image.filename.replace("\\", "/"))
+        filename = child if isinstance(child, str) else child.image.filename
+        filename = filename.replace("\\", "/")
+        self.name = sanitize_filename_spaced(filename, "images")
         self.child = renpy.easy.displayable(child)
-        self.width, self.height = get_image_size(file).get_dimensions()
+        self.width, self.height = _image_dimensions(filename)
 
-    def render(self, width, height, st, at):
-        d = self.get_displayable()
+    def _filter_state(self):
+        sf = store.screenfilter
+        return (
+            sf.blur if self.name != store.protagonist else 0.0,
+            bool(sf.colorblind),
+            bool(store.coordinate_grid_key_presses),
+        )
 
-        if store.screenfilter.blur > 0.0 and self.name != store.protagonist:
-            ro = renpy.Render(self.width, self.height)
-            d_blur = im.Blur(d, store.screenfilter.blur / 4.0)
-            child_ro = renpy.render(d_blur, self.width, self.height, st, at)
-            ro.blit(child_ro, (0, 0))
-            return ro
+    def render(self, width, height, st, at):
+        key = self._filter_state()
+        if key[:2] != (self._filter_key or ())[:2]:
+            # Blur/tint settings changed: rebuild the filtered displayable
+            d = self.get_displayable()
+            if key[0] > 0.0:
+                d = im.Blur(d, key[0] / 4.0)
+            self._filtered = d
+        self._filter_key = key
+        d = self._filtered
 
         ro = renpy.render(d, self.width, self.height, st, at)
 
-        if renpy.store.coordinate_grid_key_presses:
-            point_size = (15, 15)
-            dot = Transform(renpy.display.imagelike.Solid("#1E90FF"), maxsize=point_size)
+        # im.Blur keeps the image size, so the blurred render is returned as is
+        if key[0] > 0.0:
+            return ro
+
+        if key[2]:
+            dot = _grid_dot()
             ro.place(
                 dot,
-                x=(width // 2) - (point_size[0] // 2),
-                y=(height // 2) - (point_size[0] // 2),
-                width=point_size[0],
-                height=point_size[1],
+                x=(width // 2) - (GRID_DOT_SIZE[0] // 2),
+                y=(height // 2) - (GRID_DOT_SIZE[1] // 2),
+                width=GRID_DOT_SIZE[0],
+                height=GRID_DOT_SIZE[1],
             )
 
         return ro
 
     def per_interact(self):
-        renpy.redraw(self, 0)
+        # Only re-render when a filter setting changed since the last render
+        if self._filter_state() != self._filter_key:
+            renpy.redraw(self, 0)
 
     def visit(self):
         return [self.child]
 
     def get_displayable(self):
-        if store.screenfilter.colorblind:
-            return store.screenfilter.tint(self.child)
+        sf = store.screenfilter
+        if sf.colorblind:
+            return sf.tint(self.child)
         return self.child
 
 
+# Colorblind-tinted displayables, keyed by the original displayable. Kept at
+# module level so it is never saved with the store. Values are weak: entries
+# live only while something still shows the tinted displayable (the composed
+# sprite, FilteredImage._filtered), so turning colorblind off releases them.
+_tint_cache = weakref.WeakValueDictionary()
+
+# Simulate deuteranopia, using the physiologically-based model of Machado,
+# Oliveira & Fernandes (2009) at severity 1.0, which approximates the
+# Brettel/Viénot projection. The model is defined for linear RGB; im has no
+# gamma-decoding step, so it is applied to sRGB values as most simulators do.
+# https://www.inf.ufrgs.br/~oliveira/pubs_files/CVD_Simulation/CVD_Simulation.html
+DEUTERANOPIA_MATRIX = im.matrix(
+    0.367,
+    0.861,
+    -0.228,
+    0.0,
+    0.0,
+    0.280,
+    0.673,
+    0.047,
+    0.0,
+    0.0,
+    -0.012,
+    0.043,
+    0.969,
+    0.0,
+    0.0,
+    0.0,
+    0.0,
+    0.0,
+    1.0,
+    0.0,
+)
+
+
 class FilterProperties(RevertableObject):
     def __init__(self):
         self.colorblind = False
         self.blur = 0.0
 
+    @property
+    def tint_active(self):
+        """False when tint() would return the displayable unchanged"""
+        return bool(self.colorblind)
+
     def tint(self, displayable):
-        matrix = im.matrix.identity()
-        if store.screenfilter.colorblind:
-            # Simulate deuteranopia
-            # https://github.com/HaxePunk/post-process/blob/master/assets/shaders/color/deuteranopia.frag
-            matrix *= im.matrix(
-                0.43,
-                0.72,
-                -0.15,
-                0.0,
-                0.0,
-                0.34,
-                0.57,
-                0.09,
-                0.0,
-                0.0,
-                -0.02,
-                0.03,
-                1.00,
-                0.0,
-                0.0,
-                0.00,
-                0.00,
-                0.00,
-                1.0,
-                0.0,
-            )
-        return im.MatrixColor(displayable, matrix)
+        # Without colorblind mode the matrix would be the identity
+        if not self.tint_active:
+            return displayable
+        tinted = _tint_cache.get(displayable)
+        if tinted is None:
+            tinted = _tint_cache[displayable] = im.MatrixColor(displayable, DEUTERANOPIA_MATRIX)
+        return tinted
 
     def refresh(self):
         renpy.restart_interaction()
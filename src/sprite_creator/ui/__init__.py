@@ -13,60 +13,68 @@ Includes:
 - Review windows for outfit/expression generation
 """
 
-from .tk_common import (
+from importlib import import_module
+
+# Public names re-exported from the submodules, mapped to the submodule that
+# defines them. They are imported on first access (PEP 562), so importing
+# sprite_creator.ui doesn't load every window, PIL and requests up front.
+_LAZY_EXPORTS = {
     # Window utilities
-    compute_display_size,
-    center_and_clamp,
-    wraplength_for,
-    apply_window_size,
-    apply_dark_theme,
-    get_window_size,
-    WINDOW_SIZES,
+    "compute_display_size": "tk_common",
+    "center_and_clamp": "tk_common",
+    "wraplength_for": "tk_common",
+    "apply_window_size": "tk_common",
+    "apply_dark_theme": "tk_common",
+    "get_window_size": "tk_common",
+    "WINDOW_SIZES": "tk_common",
     # Styled components
-    create_primary_button,
-    create_secondary_button,
-    create_danger_button,
-    create_option_card,
-    create_help_button,
-    show_help_modal,
-    OptionCard,
-)
-
-from .dialogs import (
-    load_name_pool,
-    pick_random_name,
-)
+    "create_primary_button": "tk_common",
+    "create_secondary_button": "tk_common",
+    "create_danger_button": "tk_common",
+    "create_option_card": "tk_common",
+    "create_help_button": "tk_common",
+    "show_help_modal": "tk_common",
+    "OptionCard": "tk_common",
+    # Name utilities
+    "load_name_pool": "dialogs",
+    "pick_random_name": "dialogs",
+    # Review windows
+    "review_images_for_step": "review_windows",
+    "review_initial_base_pose": "review_windows",
+    "click_to_remove_background": "review_windows",
+    # Launcher
+    "LauncherWindow": "launcher",
+    "run_launcher": "launcher",
+    "select_character_folder": "launcher",
+    # Disclaimer
+    "DisclaimerWindow": "disclaimer",
+    "show_disclaimer_if_needed": "disclaimer",
+    "has_accepted_disclaimer": "disclaimer",
+    "record_disclaimer_acceptance": "disclaimer",
+    # API Setup
+    "APISetupWindow": "api_setup",
+    "show_api_setup": "api_setup",
+    "ensure_api_key": "api_setup",
+    "get_existing_api_key": "api_setup",
+    "get_existing_api_key_with_freshness": "api_setup",
+    # Full Wizard
+    "FullWizard": "full_wizard",
+    "run_full_wizard": "full_wizard",
+}
 
-from .review_windows import (
-    review_images_for_step,
-    review_initial_base_pose,
-    click_to_remove_background,
-)
 
-from .launcher import (
-    LauncherWindow,
-    run_launcher,
-    select_character_folder,
-)
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module_name}", __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
 
-from .disclaimer import (
-    DisclaimerWindow,
-    show_disclaimer_if_needed,
-    has_accepted_disclaimer,
-    record_disclaimer_acceptance,
-)
 
-from .api_setup import (
-    APISetupWindow,
-    show_api_setup,
-    ensure_api_key,
-    get_existing_api_key,
-)
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
 
-from .full_wizard import (
-    FullWizard,
-    run_full_wizard,
-)
 
 __all__ = [
     # Common utilities
@@ -106,6 +114,7 @@ __all__ = [
     "show_api_setup",
     "ensure_api_key",
     "get_existing_api_key",
+    "get_existing_api_key_with_freshness",
     # Full Wizard
     "FullWizard",
     "run_full_wizard",
@@ -5,13 +5,16 @@ Provides a GUI dialog for entering and validating Gemini API keys,
 replacing the CLI-based interactive setup.
 """
 
+import hashlib
 import json
+import os
 import queue
 import threading
+import time
 import tkinter as tk
 from tkinter import ttk
 import webbrowser
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
 from ..config import (
     CONFIG_PATH,
@@ -36,6 +39,9 @@ from .tk_common import (
     create_help_button,
 )
 
+if TYPE_CHECKING:
+    import requests
+
 
 API_SETUP_HELP_TEXT = """Getting Your Gemini API Key
 
@@ -83,6 +89,51 @@ When Credits Run Low:
 Google Cloud's $300 free trial lasts about 90 days. After it runs out, you can create a new Google account to get fresh credits. The same API key setup process applies."""
 
 
+# How long a successful key validation is trusted without asking the API again
+VALIDATION_CACHE_TTL = 600  # seconds
+
+# Successful validations: SHA-256 of the key -> (time.monotonic() when validated,
+# message, time.time() when the API last accepted the key). The wall-clock time is
+# what _save_api_key records, so a cache hit never refreshes it. Keys are hashed
+# so the raw secret is not kept around; failures are not cached.
+_validation_cache: dict[str, tuple[float, str, float]] = {}
+
+# How long a saved key counts as fresh after it was last validated
+# (see get_existing_api_key_with_freshness)
+KEY_FRESHNESS_WINDOW = 24 * 3600  # seconds
+
+
+# Validation request timeouts: (connect, read) in seconds
+VALIDATION_TIMEOUT = (3.05, 10)
+
+# Shared HTTP session for validation requests, so repeat validations reuse the
+# pooled TLS connection. Created on first use; requests is imported there too,
+# since this module is loaded at startup and most runs never validate a key.
+_session: Optional["requests.Session"] = None
+
+
+def _get_session() -> "requests.Session":
+    """Get the shared requests.Session, creating it on first use."""
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        session = requests.Session()
+        # Retry transient gateway errors with a short backoff; once retries run
+        # out the last response is returned so its status is still reported.
+        retry = Retry(
+            total=2,
+            backoff_factor=0.3,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False,
+        )
+        session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=retry))
+        _session = session
+    return _session
+
+
 class APISetupWindow:
     """
     GUI dialog for entering and validating Gemini API keys.
@@ -115,12 +166,15 @@ class APISetupWindow:
         self._existing_key = existing_key
         self._result_key: Optional[str] = None
         self._is_validating = False
+        # Stripped key being validated, read from the entry once per verify
+        # click; None when no validation is pending (or it was cancelled)
+        self._pending_key: Optional[str] = None
 
-        # Thread-safe callback queue (same pattern as FullWizard)
+        # Thread-safe callback queue (same pattern as FullWizard). It is only
+        # polled while a validation is running; see _process_callbacks.
         self._callback_queue: queue.Queue = queue.Queue()
 
         self._build_ui()
-        self._start_callback_processor()
 
         # Center on parent if toplevel and set up modal behavior
         if self._is_toplevel and parent:
@@ -139,8 +193,8 @@ class APISetupWindow:
             # Lift window above parent
             self.root.lift()
 
-            # Defer modal setup slightly to ensure window is fully mapped
-            # This fixes event processing issues on some systems
+            # Modal setup needs the window mapped; if it isn't yet, defer it
+            # slightly. This fixes event processing issues on some systems
             def setup_modal():
                 try:
                     if self.root.winfo_exists():
@@ -150,20 +204,27 @@ class APISetupWindow:
                 except tk.TclError:
                     pass  # Window was closed
 
-            self.root.after(50, setup_modal)
+            if self.root.winfo_ismapped():
+                setup_modal()
+            else:
+                self.root.after(50, setup_modal)
 
-    def _start_callback_processor(self):
-        """Start processing the thread-safe callback queue."""
+    def _process_callbacks(self):
+        """Run queued callbacks, polling again while a validation is in flight."""
         try:
             while True:
                 callback = self._callback_queue.get_nowait()
                 callback()
         except queue.Empty:
             pass
+        # The validation thread is the only producer, so stop polling once it
+        # has reported back (leaves the event loop idle otherwise)
+        if not self._is_validating:
+            return
         # Only continue polling if window still exists
         try:
             if self.root.winfo_exists():
-                self.root.after(100, self._start_callback_processor)
+                self.root.after(100, self._process_callbacks)
         except tk.TclError:
             pass
 
@@ -194,7 +255,6 @@ class APISetupWindow:
         help_btn.pack(side="right")
 
         # Check for environment variable override
-        import os
         env_key = os.environ.get("GEMINI_API_KEY")
         if env_key:
             # Show warning that env var takes precedence
@@ -386,22 +446,38 @@ class APISetupWindow:
         Returns:
             (success, message) tuple
         """
-        import requests
-
         if not api_key or len(api_key) < 10:
             return False, "API key appears too short"
 
-        # Try a simple request to check if the key is valid
-        test_url = f"https://generativelanguage.googleapis.com/v1beta/models?key={api_key}"
+        key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+        cached = _validation_cache.get(key_hash)
+        if cached and time.monotonic() - cached[0] < VALIDATION_CACHE_TTL:
+            return True, cached[1]
+
+        # Try a simple request to check if the key is valid. The key goes in
+        # params so it is not part of the URL string shown in error messages.
+        test_url = "https://generativelanguage.googleapis.com/v1beta/models"
+
+        import requests
 
         try:
-            response = requests.get(test_url, timeout=10)
+            # Only the status matters: ask for one model name instead of the full catalog
+            response = _get_session().get(
+                test_url,
+                params={"key": api_key, "pageSize": 1, "fields": "models(name)"},
+                timeout=VALIDATION_TIMEOUT,
+            )
 
             if response.status_code == 200:
-                return True, "API key is valid!"
+                message = "API key is valid!"
+                _validation_cache[key_hash] = (time.monotonic(), message, time.time())
+                return True, message
             elif response.status_code == 400:
+                _validation_cache.pop(key_hash, None)
                 return False, "Invalid API key format"
             elif response.status_code == 403:
+                # Revoked since it was last validated: drop any expired entry
+                _validation_cache.pop(key_hash, None)
                 return False, "API key is invalid or has been revoked"
             else:
                 return False, f"Validation failed: HTTP {response.status_code}"
@@ -418,9 +494,9 @@ class APISetupWindow:
         if self._is_validating:
             return
 
-        api_key = self._key_var.get().strip()
+        self._pending_key = self._key_var.get().strip()
 
-        if not api_key:
+        if not self._pending_key:
             self._set_status("Please enter an API key", DANGER_COLOR)
             return
 
@@ -430,19 +506,21 @@ class APISetupWindow:
         self._save_btn.configure(state="disabled")
 
         # Run validation in background thread to keep UI responsive
-        def validate_in_thread():
+        def validate_in_thread(api_key: str):
             success, message = self._validate_api_key(api_key)
             # Schedule callback on main thread (thread-safe)
-            self._schedule_callback(lambda: self._on_validation_complete(api_key, success, message))
+            self._schedule_callback(lambda: self._on_validation_complete(success, message))
 
-        thread = threading.Thread(target=validate_in_thread, daemon=True)
+        thread = threading.Thread(target=validate_in_thread, args=(self._pending_key,), daemon=True)
         thread.start()
+        self.root.after(100, self._process_callbacks)
 
-    def _on_validation_complete(self, api_key: str, success: bool, message: str):
-        """Handle validation completion (called on main thread)."""
+    def _on_validation_complete(self, success: bool, message: str):
+        """Handle validation completion for self._pending_key (called on main thread)."""
+        api_key, self._pending_key = self._pending_key, None
         # Check if window still exists (user might have closed it)
         try:
-            if not self.root.winfo_exists():
+            if api_key is None or not self.root.winfo_exists():
                 return
         except tk.TclError:
             return
@@ -461,23 +539,35 @@ class APISetupWindow:
             self._set_status(message, DANGER_COLOR)
 
     def _save_api_key(self, api_key: str):
-        """Save API key to config file."""
+        """Save API key to config file (atomically, via a temp file and os.replace)."""
         config = {}
-        if CONFIG_PATH.exists():
-            try:
-                with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-                    config = json.load(f)
-            except (json.JSONDecodeError, IOError):
-                pass
+        try:
+            config = json.loads(CONFIG_PATH.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError):
+            pass
 
+        # Record when the API last accepted the key, so later runs can trust it
+        # without another request (see get_existing_api_key_with_freshness). A
+        # cached validation keeps the time of the request that produced it.
+        key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+        cached = _validation_cache.get(key_hash)
+        validated_at = cached[2] if cached else time.time()
         config["api_key"] = api_key
+        config["api_key_validated_at"] = validated_at
 
         CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2)
+        tmp_path = CONFIG_PATH.with_name(CONFIG_PATH.name + ".tmp")
+        tmp_path.write_text(json.dumps(config, indent=2), encoding="utf-8")
+        os.replace(tmp_path, CONFIG_PATH)
+
+        # Keep get_existing_api_key's cache in step with what was just written
+        _config_key_cache["mtime_ns"] = CONFIG_PATH.stat().st_mtime_ns
+        _config_key_cache["key"] = api_key
+        _config_key_cache["validated_at"] = validated_at
 
     def _on_cancel(self):
         """Handle cancel button or window close."""
+        self._pending_key = None
         self._result_key = None
         self._close_window()
 
@@ -507,30 +597,76 @@ class APISetupWindow:
         return self._result_key
 
 
+# API key read from CONFIG_PATH, with the file's mtime_ns when it was read
+_config_key_cache: dict = {"mtime_ns": None, "key": None, "validated_at": None}
+
+
 def get_existing_api_key() -> Optional[str]:
     """
     Get existing API key from environment or config.
 
+    The config file is only re-read when its modification time changes.
+
     Returns:
         API key if found, None otherwise
     """
-    import os
-
     # Check environment variable first
     env_key = os.environ.get("GEMINI_API_KEY")
     if env_key:
         return env_key
 
     # Check config file
-    if CONFIG_PATH.exists():
-        try:
-            with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-                config = json.load(f)
-                return config.get("api_key")
-        except (json.JSONDecodeError, IOError):
-            pass
+    try:
+        mtime_ns = CONFIG_PATH.stat().st_mtime_ns
+    except OSError:
+        return None
+    if _config_key_cache["mtime_ns"] == mtime_ns:
+        return _config_key_cache["key"]
+
+    key = None
+    validated_at = None
+    try:
+        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+            config = json.load(f)
+            key = config.get("api_key")
+            validated_at = config.get("api_key_validated_at")
+    except (json.JSONDecodeError, IOError):
+        pass
+
+    if key and isinstance(validated_at, (int, float)):
+        # Seed the validation cache with the saved result, so re-verifying the
+        # same key shortly after a restart does not hit the API again
+        age = time.time() - validated_at
+        if 0 <= age < VALIDATION_CACHE_TTL:
+            key_hash = hashlib.sha256(key.encode("utf-8")).hexdigest()
+            _validation_cache.setdefault(key_hash, (time.monotonic() - age, "API key is valid!", validated_at))
+    else:
+        validated_at = None
+
+    _config_key_cache["mtime_ns"] = mtime_ns
+    _config_key_cache["key"] = key
+    _config_key_cache["validated_at"] = validated_at
+    return key
+
+
+def get_existing_api_key_with_freshness() -> tuple[Optional[str], bool]:
+    """
+    Get the existing API key and whether it was validated recently.
+
+    A key is fresh when it is the saved config key and was validated within
+    KEY_FRESHNESS_WINDOW. A GEMINI_API_KEY that differs from the saved key
+    is never fresh, since this app has not validated it.
+
+    Returns:
+        (api_key, is_fresh) tuple; api_key is None if no key is found
+    """
+    key = get_existing_api_key()
+    if not key or key != _config_key_cache["key"]:
+        return key, False
 
-    return None
+    validated_at = _config_key_cache["validated_at"]
+    is_fresh = validated_at is not None and 0 <= time.time() - validated_at < KEY_FRESHNESS_WINDOW
+    return key, is_fresh
 
 
 def show_api_setup(existing_key: str = "", parent: Optional[tk.Tk] = None) -> Optional[str]:
@@ -1571,8 +1571,14 @@ Click Finish to close the wizard."""
             return
 
         try:
-            from ...tools.tester import launch_sprite_tester
-            launch_sprite_tester(self.state.character_folder)
+            from ...tools.tester import is_sprite_tester_running, launch_sprite_tester_async
+            if is_sprite_tester_running():
+                messagebox.showinfo(
+                    "Sprite Tester",
+                    "The sprite tester is already open.\n\nClose Ren'Py before starting another test.",
+                )
+                return
+            launch_sprite_tester_async(self.state.character_folder)
         except Exception as e:
             show_error_dialog(self.parent, "Error", f"Failed to launch sprite tester:\n{e}")
 